@@ -0,0 +1,357 @@
+"""Local stand-in for the Google Sheets v4 values API, for offline testing.
+
+Implements values.get, values.update, values.batchGet and values.batchUpdate
+over in-memory sheets, with configurable latency, per-minute quota (429)
+and random server errors. Every spreadsheet id maps to the same workbook.
+
+It can be used two ways, both selected with FAKE_SHEETS:
+
+    FAKE_SHEETS=memory
+        build_sheets_service() returns a real googleapiclient client whose
+        HTTP transport answers from a workbook inside this process, so the
+        app runs without credentials or network and errors surface as the
+        usual HttpError.
+
+    FAKE_SHEETS=http://127.0.0.1:8089/
+        the client talks to a fake server started with
+            python fake_sheets.py --port 8089 [--rows 1000]
+        so several workers, or a Lambda run locally, share one workbook.
+
+The workbook is seeded from FAKE_SHEETS_DATA, a JSON file of
+{"Sheet1": [[header, ...], [cell, ...], ...]}, or with FAKE_SHEETS_ROWS
+synthetic guests in SHEET_NAME. FAKE_SHEETS_LATENCY_MS ("80" or "50-150"),
+FAKE_SHEETS_QUOTA_PER_MINUTE and FAKE_SHEETS_ERROR_RATE set up the injected
+latency, quota and errors.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import string
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from sheets import CELL_CHARACTER_LIMIT, column_index, column_letter
+
+# The columns of the RSVP sheet (main.HEADERS), for synthetic guests
+GUEST_HEADERS = [
+    "accessCode", "maxGuests", "partyName", "confirmedGuests", "phoneNumber", "emailAddress",
+    "rsvpAsk", "dietaryRestrictions", "hotelAccommodations", "questions", "rawNames",
+]
+
+CELL_PATTERN = re.compile(r'([A-Z]*)([0-9]*)')
+
+VALUES_PATH = re.compile(r'/v4/spreadsheets/([^/]+)/values(?::(batchGet|batchUpdate)|/(.+))$')
+
+
+class SheetsApiError(Exception):
+    """An error response, with the HTTP status and Google API status it is sent as"""
+
+    def __init__(self, code: int, status: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.status = status
+
+
+def synthetic_guests(rows: int, headers: list = GUEST_HEADERS) -> List[list]:
+    """A header row plus `rows` guests with unique access codes (as long as the NANGIE codes last)"""
+    alphabet = string.ascii_uppercase + string.digits
+    codes = (f"NANGIE{''.join(chars)}" for chars in itertools.product(alphabet, repeat=3))
+    grid = [list(headers)]
+    for number in range(rows):
+        code = next(codes, None) or f"GUEST{number:06d}"
+        grid.append([code, '4', f"Party {number}", '', '555-0100', f"guest{number}@example.com",
+                     '', '', '', '', f"Guest {number} and partner"][:len(headers)])
+    return grid
+
+
+class FakeSheets:
+    """In-memory workbook answering Sheets v4 values requests"""
+
+    def __init__(self, sheets: Dict[str, List[list]] = None, latency: Tuple[float, float] = (0, 0),
+                 quota_per_minute: int = 0, error_rate: float = 0):
+        self.sheets = {name: [list(row) for row in grid] for name, grid in (sheets or {'Sheet1': []}).items()}
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+
+        self.requests = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'FakeSheets':
+        data_path = os.getenv("FAKE_SHEETS_DATA")
+        if data_path:
+            with open(data_path) as f:
+                sheets = json.load(f)
+        else:
+            sheets = {os.getenv("SHEET_NAME", "Sheet1"): synthetic_guests(int(os.getenv("FAKE_SHEETS_ROWS", 100)))}
+
+        low, _, high = os.getenv("FAKE_SHEETS_LATENCY_MS", "0").partition('-')
+        return cls(
+            sheets,
+            latency=(float(low) / 1000, float(high or low) / 1000),
+            quota_per_minute=int(os.getenv("FAKE_SHEETS_QUOTA_PER_MINUTE", 0)),
+            error_rate=float(os.getenv("FAKE_SHEETS_ERROR_RATE", 0))
+        )
+
+    # ---------- Ranges ----------
+    def _parse_range(self, a1: str) -> Tuple[str, int, Optional[int], int, Optional[int]]:
+        """(sheet, first row, last row, first column, last column), 0-based with None for open ends"""
+        if '!' in a1:
+            sheet, cells = a1.rsplit('!', 1)
+            sheet = sheet.strip("'")
+        elif a1 in self.sheets:
+            sheet, cells = a1, ''
+        else:
+            sheet, cells = next(iter(self.sheets)), a1
+        if sheet not in self.sheets:
+            raise SheetsApiError(400, 'INVALID_ARGUMENT', f"Unable to parse range: {a1}")
+        if not cells:
+            return sheet, 0, None, 0, None
+
+        first, _, last = cells.partition(':')
+        first_match, last_match = CELL_PATTERN.fullmatch(first), CELL_PATTERN.fullmatch(last or first)
+        if not first_match or not last_match or not first:
+            raise SheetsApiError(400, 'INVALID_ARGUMENT', f"Unable to parse range: {a1}")
+
+        first_column, first_row = first_match.groups()
+        last_column, last_row = last_match.groups()
+        return (
+            sheet,
+            int(first_row) - 1 if first_row else 0,
+            int(last_row) - 1 if last_row else None,
+            column_index(first_column) if first_column else 0,
+            column_index(last_column) if last_column else None,
+        )
+
+    def _read(self, a1: str) -> dict:
+        sheet, first_row, last_row, first_column, last_column = self._parse_range(a1)
+        grid = self.sheets[sheet]
+        stop_row = len(grid) if last_row is None else last_row + 1
+        stop_column = None if last_column is None else last_column + 1
+
+        values = []
+        for row in grid[first_row:stop_row]:
+            cells = row[first_column:stop_column]
+            # Like the real API, trailing empty cells and rows are left out
+            while cells and cells[-1] == '':
+                cells.pop()
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+
+        value_range = {'range': a1, 'majorDimension': 'ROWS'}
+        if values:
+            value_range['values'] = values
+        return value_range
+
+    @staticmethod
+    def _check(values: list):
+        """Reject values Sheets would not store, before anything is written"""
+        for row_values in values:
+            for value in row_values:
+                if value is not None and len(str(value)) > CELL_CHARACTER_LIMIT:
+                    raise SheetsApiError(400, 'INVALID_ARGUMENT',
+                                         f"Your input contains more than the maximum of {CELL_CHARACTER_LIMIT} "
+                                         "characters in a single cell.")
+
+    def _write(self, a1: str, values: list) -> dict:
+        sheet, first_row, _, first_column, _ = self._parse_range(a1)
+        grid = self.sheets[sheet]
+        cells = 0
+        for row_offset, row_values in enumerate(values):
+            row_number = first_row + row_offset
+            while len(grid) <= row_number:
+                grid.append([])
+            row = grid[row_number]
+            for column_offset, value in enumerate(row_values):
+                column = first_column + column_offset
+                row.extend([''] * (column + 1 - len(row)))
+                row[column] = '' if value is None else str(value)
+                cells += 1
+
+        width = max((len(row) for row in values), default=0)
+        return {
+            'updatedRange': f"{sheet}!{column_letter(first_column)}{first_row + 1}:"
+                            f"{column_letter(first_column + max(width, 1) - 1)}{first_row + max(len(values), 1)}",
+            'updatedRows': len(values),
+            'updatedColumns': width,
+            'updatedCells': cells,
+        }
+
+    # ---------- Requests ----------
+    def _admit(self):
+        """Apply latency, quota and error injection to one request"""
+        low, high = self.latency
+        if high:
+            time.sleep(random.uniform(low, high))
+
+        with self._lock:
+            self.requests += 1
+            if self.quota_per_minute:
+                now = time.monotonic()
+                while self._recent and self._recent[0] <= now - 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.quota_per_minute:
+                    raise SheetsApiError(429, 'RESOURCE_EXHAUSTED',
+                                         "Quota exceeded for quota metric 'Read requests' and limit 'Read requests per minute'")
+                self._recent.append(now)
+
+        if self.error_rate and random.random() < self.error_rate:
+            raise SheetsApiError(500, 'INTERNAL', "Internal error encountered.")
+
+    def handle(self, method: str, uri: str, body: Optional[bytes], headers: dict = None) -> Tuple[int, dict]:
+        """Answer one Sheets API request, returns (HTTP status, JSON body)"""
+        url = urlsplit(uri)
+        query = parse_qs(url.query)
+
+        # googleapiclient sends a GET with a very long URL (a large batchGet) as a POST with the query as form body
+        override = {key.lower(): value for key, value in (headers or {}).items()}.get('x-http-method-override')
+        if override and method == 'POST':
+            method = override
+            query.update(parse_qs(body.decode() if body else ''))
+            body = None
+
+        try:
+            match = VALUES_PATH.fullmatch(url.path)
+            if not match:
+                raise SheetsApiError(404, 'NOT_FOUND', f"Not implemented by the fake Sheets API: {method} {url.path}")
+            spreadsheet_id, batch, a1 = unquote(match.group(1)), match.group(2), match.group(3)
+            payload = json.loads(body) if body else {}
+
+            self._admit()
+            with self._lock:
+                if a1 is not None and method == 'GET':
+                    return 200, self._read(unquote(a1))
+                if a1 is not None and method == 'PUT':
+                    self._check(payload.get('values', []))
+                    return 200, {'spreadsheetId': spreadsheet_id, **self._write(unquote(a1), payload.get('values', []))}
+                if batch == 'batchGet' and method == 'GET':
+                    return 200, {'spreadsheetId': spreadsheet_id,
+                                 'valueRanges': [self._read(a1) for a1 in query.get('ranges', [])]}
+                if batch == 'batchUpdate' and method == 'POST':
+                    # All or nothing, like the real batchUpdate
+                    for data in payload.get('data', []):
+                        self._check(data.get('values', []))
+                    responses = [{'spreadsheetId': spreadsheet_id, **self._write(data['range'], data.get('values', []))}
+                                 for data in payload.get('data', [])]
+                    return 200, {
+                        'spreadsheetId': spreadsheet_id,
+                        'totalUpdatedRows': sum(response['updatedRows'] for response in responses),
+                        'totalUpdatedColumns': max((response['updatedColumns'] for response in responses), default=0),
+                        'totalUpdatedCells': sum(response['updatedCells'] for response in responses),
+                        'totalUpdatedSheets': len({response['updatedRange'].split('!')[0] for response in responses}),
+                        'responses': responses,
+                    }
+            raise SheetsApiError(404, 'NOT_FOUND', f"Not implemented by the fake Sheets API: {method} {url.path}")
+        except SheetsApiError as e:
+            return e.code, {'error': {'code': e.code, 'message': str(e), 'status': e.status}}
+        except (ValueError, KeyError) as e:
+            return 400, {'error': {'code': 400, 'message': f"Invalid request: {e}", 'status': 'INVALID_ARGUMENT'}}
+
+
+class FakeSheetsHttp:
+    """httplib2.Http stand-in that answers googleapiclient requests from a FakeSheets"""
+
+    def __init__(self, sheets: FakeSheets):
+        self.sheets = sheets
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        import httplib2
+
+        if isinstance(body, str):
+            body = body.encode()
+        status, payload = self.sheets.handle(method, uri, body, headers)
+        return httplib2.Response({'status': status, 'content-type': 'application/json; charset=UTF-8'}), json.dumps(payload).encode()
+
+    def close(self):
+        pass
+
+
+# The workbook shared by every in-process client (SheetsPool threads, the Lambda handler)
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_sheets() -> FakeSheets:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = FakeSheets.from_env()
+        return _shared
+
+
+def build_service(target: str):
+    """A Sheets v4 client for a FAKE_SHEETS value: "memory" or the URL of a fake server"""
+    import httplib2
+    from googleapiclient.discovery import build
+
+    if target == 'memory':
+        http = FakeSheetsHttp(shared_sheets())
+        return build('sheets', 'v4', http=http, cache_discovery=False, static_discovery=True)
+    return build('sheets', 'v4', http=httplib2.Http(timeout=10), cache_discovery=False, static_discovery=True,
+                 client_options={'api_endpoint': target})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    sheets: FakeSheets = None
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        status, payload = self.sheets.handle(self.command, self.path, self.rfile.read(length) if length else None,
+                                             dict(self.headers))
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_PUT = do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(sheets: FakeSheets, host: str = '127.0.0.1', port: int = 8089) -> ThreadingHTTPServer:
+    """A fake Sheets API server on host:port; call serve_forever() (or run it on a thread)"""
+    handler = type('FakeSheetsHandler', (_Handler,), {'sheets': sheets})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Google Sheets v4 values API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--rows', type=int, help='synthetic guests (default FAKE_SHEETS_ROWS or 100)')
+    parser.add_argument('--data', help='JSON file of {"Sheet1": [[...], ...]} to serve instead')
+    parser.add_argument('--latency-ms', help='added latency per request, e.g. 80 or 50-150')
+    parser.add_argument('--quota-per-minute', type=int, help='requests per minute before answering 429')
+    parser.add_argument('--error-rate', type=float, help='fraction of requests answered with a 500')
+    args = parser.parse_args()
+
+    for option, variable in (('rows', 'FAKE_SHEETS_ROWS'), ('data', 'FAKE_SHEETS_DATA'), ('latency_ms', 'FAKE_SHEETS_LATENCY_MS'),
+                             ('quota_per_minute', 'FAKE_SHEETS_QUOTA_PER_MINUTE'), ('error_rate', 'FAKE_SHEETS_ERROR_RATE')):
+        if getattr(args, option) is not None:
+            os.environ[variable] = str(getattr(args, option))
+
+    sheets = FakeSheets.from_env()
+    server = serve(sheets, args.host, args.port)
+    print(f"Fake Sheets API on http://{args.host}:{args.port}/ "
+          f"({', '.join(f'{name}: {len(grid)} rows' for name, grid in sheets.sheets.items())})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,11 @@
 from flask import Flask, render_template, request, jsonify, send_from_directory
 import json
+import os
 import time
 import threading
 import qrcode
 import io
-import base64
+import hashlib
 from datetime import datetime
 
 app = Flask(__name__)
@@ -24,153 +25,14 @@ game_state = {
     'show_answer': False
 }
 
-# Trivia questions - Custom wedding questions for Navneet & Angie
-# Total: 15 questions × 30 seconds each + 14 intermissions × 30 seconds = 14.5 minutes
-trivia_questions = [
-    # Round 1: Culture Club
-    {
-        'category': 'Culture Club - Vietnam',
-        'question': 'What is the name of the traditional Vietnamese dress worn at weddings and formal events?',
-        'options': ['Kimono', 'Ao Dai', 'Hanbok', 'Sari'],
-        'correct': 1,
-        'points': 100
-    },
-    {
-        'category': 'Culture Club - India',
-        'question': 'What spice is commonly used in Indian chai?',
-        'options': ['Cumin', 'Paprika', 'Cardamom', 'Ginger'],
-        'correct': 2,
-        'points': 100
-    },
-    {
-        'category': 'Culture Club - Canada',
-        'question': 'What sweet treat is made from snow and maple syrup in Canada?',
-        'options': ['Beaver Tail', 'Maple Taffy', 'Sugar Pancake', 'Frozen Syrup Pop'],
-        'correct': 1,
-        'points': 100
-    },
-    {
-        'category': 'Culture Club - USA',
-        'question': 'Which U.S. state has the largest Vietnamese population?',
-        'options': ['Texas', 'New York', 'Washington', 'California'],
-        'correct': 3,
-        'points': 100
-    },
-    {
-        'category': 'Culture Club - Geography',
-        'question': 'Put these in order of population (most to least): India, Vietnam, Canada',
-        'options': ['India > Canada > Vietnam', 'Vietnam > India > Canada', 'India > Vietnam > Canada', 'Canada > India > Vietnam'],
-        'correct': 2,
-        'points': 150
-    },
-    # Round 2: Nangie or Nah?
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who had a pet dog named Sushi growing up?',
-        'options': ['Navneet', 'Angie', 'Both', 'Neither'],
-        'correct': 1,
-        'points': 150
-    },
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who was once part of a competitive dance team?',
-        'options': ['Navneet', 'Angie', 'Both', 'Neither'],
-        'correct': 3,
-        'points': 150
-    },
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who owns more tech gadgets?',
-        'options': ['Navneet', 'Angie', 'Both', 'Sushi'],
-        'correct': 0,
-        'points': 150
-    },
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who is more likely to cry during a Disney movie?',
-        'options': ['Navneet', 'Angie', 'Both', 'Neither'],
-        'correct': 1,
-        'points': 150
-    },
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who said "I love you" first?',
-        'options': ['Navneet', 'Angie', 'Both at the same time', 'No one remembers'],
-        'correct': 1,  # You can update this with the real answer
-        'points': 200
-    },
-    # Round 3: Wedding Whirlwind
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'What flower is traditionally thrown at Indian weddings for blessings?',
-        'options': ['Lotus', 'Jasmine', 'Marigold', 'Rose'],
-        'correct': 3,
-        'points': 200
-    },
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'Which of these fruits is commonly found in Vietnamese wedding baskets?',
-        'options': ['Apple', 'Mango', 'Blueberry', 'Kiwi'],
-        'correct': 1,
-        'points': 200
-    },
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'In which language is "I love you" said as "Anh yêu em"?',
-        'options': ['Tagalog', 'Thai', 'Vietnamese', 'Lao'],
-        'correct': 2,
-        'points': 200
-    },
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'Which Bollywood movie is famously about a big Indian wedding?',
-        'options': ['Lagaan', 'Monsoon Wedding', 'Slumdog Millionaire', 'Chennai Express'],
-        'correct': 1,
-        'points': 250
-    },
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'What does "Namaste" literally mean?',
-        'options': ['Hello', 'I respect you', 'I bow to you', 'Let\'s eat'],
-        'correct': 2,
-        'points': 250
-    },
-    {
-        'category': 'Vietnamese Language',
-        'question': 'How do you say "Thank you" in Vietnamese?',
-        'options': ['Xin chào', 'Cảm ơn', 'Tạm biệt', 'Xin lỗi'],
-        'correct': 1,
-        'points': 200
-    },
-    {
-        'category': 'Indian Traditions',
-        'question': 'In traditional Indian weddings, what do couples walk around during the ceremony?',
-        'options': ['A tree', 'Sacred fire', 'Temple', 'Altar'],
-        'correct': 1,
-        'points': 200
-    },
-    {
-        'category': 'Canadian Geography',
-        'question': 'Which province is known for its maple syrup production?',
-        'options': ['Ontario', 'Quebec', 'British Columbia', 'Alberta'],
-        'correct': 1,
-        'points': 200
-    },
-    {
-        'category': 'About the Couple',
-        'question': 'Based on the ceremony schedule, who is officiating Navneet and Angie\'s wedding?',
-        'options': ['Navneet', 'Naveen', 'Edward', 'Xavier'],
-        'correct': 1,
-        'points': 250
-    },
-    {
-        'category': 'Love & Marriage',
-        'question': 'According to the wedding schedule, what ceremony happens BEFORE the vows on July 30th?',
-        'options': ['Tea Ceremony', 'Mallu Ceremony', 'Ring Exchange', 'Photo Session'],
-        'correct': 1,
-        'points': 300
-    }
-]
+# Trivia questions, shared with the FastAPI app (game/questions/wedding.json)
+def load_trivia_questions(name='wedding'):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questions', f'{name}.json')
+    with open(path, encoding='utf-8') as f:
+        bank = json.load(f)
+    return [question for round_ in bank['rounds'] for question in round_['questions']]
+
+trivia_questions = load_trivia_questions()
 
 @app.route('/')
 def index():
@@ -294,15 +156,21 @@ def start_question():
 def show_answer():
     """Show the correct answer and calculate scores"""
     if 'current_answers' in game_state and game_state['current_question'] < len(trivia_questions):
-        correct_answer = trivia_questions[game_state['current_question']]['correct']
-        points = trivia_questions[game_state['current_question']]['points']
+        question = trivia_questions[game_state['current_question']]
+        correct_answer = question['correct']
+        double_or_nothing = question.get('scoring') == 'double_or_nothing'
         
         # Calculate scores for current question
         correct_teams = []
         for team_name, answer_data in game_state['current_answers'].items():
             if answer_data['answer'] == correct_answer:
-                game_state['scores'][team_name] += points
                 correct_teams.append(team_name)
+            
+            # Double or nothing has no points: it doubles or resets the team's score
+            if double_or_nothing:
+                game_state['scores'][team_name] *= 2 if answer_data['answer'] == correct_answer else 0
+            elif answer_data['answer'] == correct_answer:
+                game_state['scores'][team_name] += question['points']
     
     game_state['answers_locked'] = True
     game_state['show_answer'] = True
@@ -351,32 +219,43 @@ def reset_game():
     })
     return jsonify({'success': True})
 
-@app.route('/game/qr')
-def generate_qr():
+# Join URL -> PNG bytes, rendered once
+_qr_images = {}
+
+def _join_url():
     # Get the local IP address for the QR code
     import socket
     hostname = socket.gethostname()
     local_ip = socket.gethostbyname(hostname)
     
-    # Create QR code pointing to the game interface
-    qr_url = f"http://{local_ip}:8090/game"
-    
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(qr_url)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to base64 for display
-    buffered = io.BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
+    # QR code pointing to the game interface
+    return f"http://{local_ip}:8090/game"
+
+@app.route('/game/qr')
+def generate_qr():
+    return render_template('qr.html', qr_src='/game/qr.png', qr_url=_join_url())
+
+@app.route('/game/qr.png')
+def qr_png():
+    qr_url = _join_url()
+    if qr_url not in _qr_images:
+        qr = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr.add_data(qr_url)
+        qr.make(fit=True)
+        
+        img = qr.make_image(fill_color="black", back_color="white")
+        buffered = io.BytesIO()
+        img.save(buffered, format="PNG", optimize=True)
+        _qr_images[qr_url] = buffered.getvalue()
     
-    return render_template('qr.html', qr_image=img_str, qr_url=qr_url)
+    response = app.response_class(_qr_images[qr_url], mimetype='image/png')
+    response.set_etag(hashlib.sha256(_qr_images[qr_url]).hexdigest()[:32])
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
 
 if __name__ == '__main__':
     # Create templates directory and files
-    import os
     if not os.path.exists('templates'):
         os.makedirs('templates')
     
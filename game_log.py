@@ -0,0 +1,186 @@
+"""Append-only event log for the trivia game.
+
+Every state transition is appended as one JSON line the moment it happens,
+and the lines written since the last flush share a single fsync every
+`flush_interval` seconds, so a burst of answer submissions costs one disk
+sync rather than one each. Every `snapshot_every` events the full state is
+saved next to the log together with the byte offset it corresponds to, so
+recovery restores the snapshot and only replays the events written after it.
+
+Sequence numbers carry on from the last complete line of the log, and a line
+torn by a crash is cut off before anything is appended after it.
+
+When several workers share one SQLite store they also share one log. Their
+transitions run inside the store's write transaction, so only one worker
+writes at a time; a `shared` log first catches up with whatever the other
+workers appended before writing its own line, and takes no snapshots since
+the store already holds the state.
+
+The log itself is never truncated, which makes it a complete record of the
+evening for later analysis.
+"""
+import asyncio
+import json
+import os
+import time
+
+# How far back from the end of the log to read at a time looking for its last line
+_TAIL_CHUNK = 4096
+
+
+class EventLog:
+    """Fsynced JSON-lines log of game transitions with periodic snapshots"""
+
+    def __init__(self, path: str, flush_interval: float = 0.05, snapshot_every: int = 500,
+                 shared: bool = False):
+        self.path = path
+        self.snapshot_path = path + '.snapshot'
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.shared = shared
+
+        self._seq = 0
+        self._pending_snapshot = None
+        self._unsynced = False
+        self._file = None
+        # End of the log as this process last wrote or read it
+        self._offset = 0
+
+    def append(self, event_type: str, fields: dict, state=None):
+        """Write an event; `state` is snapshotted when a snapshot is due"""
+        try:
+            if self.shared:
+                self._catch_up()
+            event = {'seq': self._seq + 1, 'at': time.time(), 'type': event_type, **fields}
+            line = (json.dumps(event, separators=(',', ':')) + '\n').encode()
+            self._file.write(line)
+        except OSError as e:
+            print(f"Error writing game event log: {str(e)}")
+            return
+        self._seq += 1
+        self._offset += len(line)
+        self._unsynced = True
+
+        if state is not None and not self.shared and self._seq % self.snapshot_every == 0:
+            self._pending_snapshot = (self._seq, self._offset, state.snapshot_after(event_type))
+
+    def _catch_up(self):
+        """Continue after the lines other workers appended since this one last wrote"""
+        size = os.fstat(self._file.fileno()).st_size
+        if size != self._offset:
+            self._offset, self._seq = self._tail(size)
+            if self._offset < size:
+                self._file.truncate(self._offset)
+
+    def _tail(self, size: int) -> tuple:
+        """End offset and seq of the last complete line in the first `size` bytes of the log"""
+        with open(self.path, 'rb') as f:
+            position, data = size, b''
+            while position > 0:
+                step = min(_TAIL_CHUNK, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+                end = data.rfind(b'\n')
+                start = data.rfind(b'\n', 0, end) if end != -1 else -1
+                if end != -1 and (start != -1 or position == 0):
+                    return position + end + 1, json.loads(data[start + 1:end + 1])['seq']
+        return 0, 0
+
+    def _sync(self, snapshot):
+        os.fsync(self._file.fileno())
+        if snapshot:
+            self._write_snapshot(*snapshot)
+
+    def _write_snapshot(self, seq: int, offset: int, state: dict):
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'seq': seq, 'offset': offset, 'state': state}, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+    async def flush(self):
+        """Fsync everything written so far, then save a snapshot if one is due"""
+        if not self._unsynced:
+            return
+        self._unsynced = False
+        snapshot, self._pending_snapshot = self._pending_snapshot, None
+        await asyncio.to_thread(self._sync, snapshot)
+
+    async def run(self):
+        """Flush every flush_interval seconds until cancelled"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    await self.flush()
+                except OSError as e:
+                    print(f"Error writing game event log: {str(e)}")
+        finally:
+            await self.flush()
+
+    def open(self, offset: int = None):
+        """Open the log for appending after its last complete line (or `offset`),
+        continuing its sequence numbers"""
+        # Unbuffered, so every line reaches the file before the transition ends
+        self._file = open(self.path, 'ab', buffering=0)
+        if self.shared:
+            # Other workers may be writing right now; catch up on the first append,
+            # which runs inside the store's write transaction
+            self._offset = -1
+            return
+
+        size = os.fstat(self._file.fileno()).st_size
+        if offset is not None and offset < size:
+            self._file.truncate(offset)
+            size = offset
+        self._offset, seq = self._tail(size)
+        if self._offset < size:
+            self._file.truncate(self._offset)
+        self._seq = max(self._seq, seq)
+
+    def replay(self, state) -> int:
+        """Rebuild `state` from the latest snapshot plus the events after it and
+        open the log for appending, returns the number of events replayed"""
+        offset = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            state.restore(snapshot['state'])
+            self._seq = snapshot['seq']
+            offset = snapshot['offset']
+
+        replayed = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Torn write from a crash; the line is cut off on open
+                        break
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash; everything after it is discarded
+                        break
+                    state.apply_event(event)
+                    self._seq = event['seq']
+                    offset += len(line)
+                    replayed += 1
+
+        self.open(offset)
+        return replayed
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def open_event_log(path: str, shared: bool = False):
+    """Create the event log from a GAME_EVENT_LOG value, None if logging is off;
+    `shared` when other workers write to the same log"""
+    if not path:
+        return None
+    return EventLog(path, shared=shared)
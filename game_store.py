@@ -0,0 +1,161 @@
+"""Storage backends for the trivia game state.
+
+The game state object lives in each worker process. A store decides where the
+authoritative copy is kept and how workers stay in sync:
+
+    memory             - this process only (single uvicorn worker)
+    sqlite:///path.db  - a SQLite database in WAL mode shared by every worker
+                         on the host, with changes fanned out by polling
+
+A store only needs the state to provide snapshot() and restore(snapshot).
+"""
+import asyncio
+import json
+import sqlite3
+from contextlib import asynccontextmanager
+
+
+class MemoryStateStore:
+    """Keeps the game state in this process only"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    def load(self, state) -> bool:
+        return False
+
+    @asynccontextmanager
+    async def transaction(self, state):
+        """Serialize a state transition"""
+        async with self._lock:
+            yield
+
+    async def watch(self, state, on_change):
+        """Nothing else writes to this store, so there is nothing to watch"""
+        return
+
+    def close(self):
+        pass
+
+
+class SQLiteStateStore:
+    """Keeps the game state in a SQLite database shared by several workers.
+
+    Every transition runs inside BEGIN IMMEDIATE, which serializes writers
+    across processes. It first reloads the state if another worker saved a
+    newer revision, and saves a new revision when it ends. A watcher polls
+    PRAGMA data_version (which needs no table read) to pick up changes made
+    by other workers and notify local subscribers.
+
+    BEGIN IMMEDIATE can wait up to busy_timeout for another worker's write
+    lock, so it runs on a thread. The reads and writes inside the transaction
+    are short and run on the event loop.
+
+    `rejections` are the exceptions a transition raises before changing
+    anything, like a refused game action. They roll back and keep the
+    in-memory state; any other exception forces a reload from the database.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.1, busy_timeout: float = 5.0,
+                 rejections: tuple = ()):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.rejections = rejections
+        self._lock = asyncio.Lock()
+        self._revision = None
+        self._on_change = None
+
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS game_state ('
+            ' id INTEGER PRIMARY KEY CHECK (id = 1),'
+            ' revision INTEGER NOT NULL,'
+            ' snapshot TEXT NOT NULL)'
+        )
+        self._data_version = self._read_data_version()
+
+    def _read_data_version(self) -> int:
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _refresh(self, state) -> bool:
+        """Reload the state if the stored revision differs, returns True if it did"""
+        row = self._conn.execute('SELECT revision, snapshot FROM game_state WHERE id = 1').fetchone()
+        if row is None or row[0] == self._revision:
+            return False
+
+        state.restore(json.loads(row[1]))
+        self._revision = row[0]
+        return True
+
+    def _save(self, state):
+        revision = (self._revision or 0) + 1
+        self._conn.execute(
+            'INSERT INTO game_state (id, revision, snapshot) VALUES (1, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET revision = excluded.revision, snapshot = excluded.snapshot',
+            (revision, json.dumps(state.snapshot(), separators=(',', ':')))
+        )
+        self._revision = revision
+
+    def load(self, state) -> bool:
+        """Restore the last saved state, returns False if nothing was saved yet"""
+        return self._refresh(state)
+
+    @asynccontextmanager
+    async def transaction(self, state):
+        """Serialize a state transition across workers and persist its result"""
+        async with self._lock:
+            await asyncio.to_thread(self._conn.execute, 'BEGIN IMMEDIATE')
+            loaded_version = None
+            try:
+                if self._refresh(state):
+                    loaded_version = state.version
+                yield
+                self._save(state)
+                self._conn.execute('COMMIT')
+            except BaseException as e:
+                self._conn.execute('ROLLBACK')
+                if not isinstance(e, self.rejections):
+                    # The in-memory state may be ahead of the database now
+                    self._revision = None
+                raise
+            finally:
+                self._data_version = self._read_data_version()
+                # Another worker's change was loaded here and not republished
+                if loaded_version is not None and state.version == loaded_version and self._on_change:
+                    self._on_change()
+
+    async def watch(self, state, on_change):
+        """Pick up transitions made by other workers and call on_change() for each"""
+        self._on_change = on_change
+        while True:
+            await asyncio.sleep(self.poll_interval)
+
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                continue
+            self._data_version = data_version
+
+            async with self._lock:
+                version = state.version
+                try:
+                    refreshed = self._refresh(state)
+                except sqlite3.Error as e:
+                    print(f"Error reloading game state: {str(e)}")
+                    continue
+
+            if refreshed and state.version != version:
+                on_change()
+
+    def close(self):
+        self._conn.close()
+
+
+def open_state_store(url: str, rejections: tuple = ()):
+    """Create a store from a GAME_STATE_STORE value, see SQLiteStateStore for `rejections`"""
+    if url == 'memory':
+        return MemoryStateStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteStateStore(url[len('sqlite:///'):], rejections=rejections)
+    raise ValueError(f"Unsupported game state store: {url}")
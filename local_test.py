@@ -5,12 +5,23 @@ from backend_lambda import lambda_handler
 # Initialize Flask app
 app = Flask(__name__)
 
-def create_mock_event(path_parameters=None, query_parameters=None, body=None):
-    """Create a mock API Gateway event"""
+def create_mock_event(path_parameters=None, query_parameters=None, body=None, method='GET'):
+    """Create a mock API Gateway proxy event for /user/{code}"""
+    path = f"/user/{(path_parameters or {}).get('code', '')}"
     return {
-        'pathParameters': path_parameters or {},
-        'queryStringParameters': query_parameters or {},
+        'resource': '/{proxy+}',
+        'path': path,
+        'httpMethod': method,
+        'headers': {'Host': 'localhost', 'Content-Type': 'application/json'},
+        'multiValueHeaders': {},
+        'pathParameters': {'proxy': path.lstrip('/')},
+        'queryStringParameters': query_parameters or None,
+        'multiValueQueryStringParameters': None,
+        'stageVariables': None,
+        'requestContext': {'resourcePath': '/{proxy+}', 'httpMethod': method, 'path': path,
+                           'stage': 'prod', 'identity': {'sourceIp': '127.0.0.1'}},
         'body': json.dumps(body) if body else None,
+        'isBase64Encoded': False,
     }
 
 @app.route('/test/direct', methods=['GET'])
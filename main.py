@@ -1,24 +1,31 @@
 # Your existing imports
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from typing import Dict, Optional
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from contextlib import contextmanager
 import os
-import uvicorn
+import re
+from game_log import open_event_log
+from game_store import open_state_store
+from question_bank import QuestionBank, QuestionBankError, list_banks, load_question_bank
+import metrics
+import qr_codes
+from sheets import RsvpIndex, RsvpWriteQueue, SheetsPool, is_valid_code
 from pydantic import BaseModel, ConfigDict
 from dotenv import load_dotenv
 import json
+import orjson
+import secrets
 
 # Additional imports for game
+import asyncio
+import bisect
+import heapq
+from array import array
+from dataclasses import dataclass
 import time
-import qrcode
-import io
-import base64
 import socket
+from collections import OrderedDict
 from datetime import datetime
 
 # Load environment variables
@@ -42,167 +49,937 @@ HEADERS = [
     "rawNames",
 ]
 
-# Add CORS middleware
+# Add CORS middleware; ALLOWED_ORIGINS is a comma-separated list of sites that
+# may call the API with credentials
+ALLOWED_ORIGINS = [origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "https://nangie.framer.website").split(",") if origin.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-# Game templates setup
-game_templates = Jinja2Templates(directory="game/templates")
+# Request counts and per-route latency for /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Game templates, set up when a page is first rendered: Jinja2 adds tens of
+# milliseconds to a Lambda cold start that only serves API requests
+_game_templates = None
+
+def game_templates():
+    global _game_templates
+    if _game_templates is None:
+        from fastapi.templating import Jinja2Templates
+        _game_templates = Jinja2Templates(directory="game/templates")
+    return _game_templates
+
+# ==================== LEADERBOARD ====================
+class Leaderboard:
+    """Team scores kept in rank order, re-ranked only when a score changes.
+    
+    Ties keep registration order, like the stable sort used before. Rank
+    lists are replaced rather than mutated, so snapshots holding on to
+    ranked() stay consistent.
+    """
+    
+    def __init__(self):
+        self._scores = {}
+        self._joined = {}
+        self._keys = []
+        self._ranked = []
+        self._positions = {}
+    
+    def __len__(self) -> int:
+        return len(self._scores)
+    
+    def __contains__(self, team_name) -> bool:
+        return team_name in self._scores
+    
+    def _key(self, team_name: str):
+        return (-self._scores[team_name], self._joined[team_name])
+    
+    def _reindex(self, start: int = 0):
+        for position in range(start, len(self._ranked)):
+            self._positions[self._ranked[position][0]] = position
+    
+    def add_team(self, team_name: str):
+        """Add a team with a score of zero"""
+        if team_name in self._scores:
+            return
+        
+        self._scores[team_name] = 0
+        self._joined[team_name] = len(self._joined)
+        key = self._key(team_name)
+        
+        position = bisect.bisect(self._keys, key)
+        self._keys = self._keys[:position] + [key] + self._keys[position:]
+        self._ranked = self._ranked[:position] + [(team_name, 0)] + self._ranked[position:]
+        self._reindex(position)
+    
+    def apply(self, deltas: Dict[str, int]) -> bool:
+        """Add per-team score deltas and re-rank once, returns True if anything changed"""
+        changed = False
+        for team_name, delta in deltas.items():
+            if delta and team_name in self._scores:
+                self._scores[team_name] += delta
+                changed = True
+        
+        if changed:
+            order = sorted(self._scores, key=self._key)
+            self._keys = [self._key(team_name) for team_name in order]
+            self._ranked = [(team_name, self._scores[team_name]) for team_name in order]
+            self._reindex()
+        return changed
+    
+    @classmethod
+    def from_scores(cls, scores: list) -> 'Leaderboard':
+        """Rebuild from (team, score) pairs given in registration order"""
+        leaderboard = cls()
+        for team_name, _ in scores:
+            leaderboard.add_team(team_name)
+        leaderboard.apply(dict(scores))
+        return leaderboard
+    
+    def scores(self) -> list:
+        """All (team, score) pairs in registration order"""
+        return list(self._scores.items())
+    
+    def score(self, team_name: str) -> int:
+        return self._scores[team_name]
+    
+    def rank(self, team_name: str) -> int:
+        """1-based rank of a team"""
+        return self._positions[team_name] + 1
+    
+    def ranked(self) -> list:
+        """All (team, score) pairs, best first"""
+        return self._ranked
+    
+    def top(self, n: int) -> list:
+        return self._ranked[:n]
+    
+    def around(self, team_name: str, radius: int) -> list:
+        """Up to `radius` neighbours on each side of a team, with 1-based ranks"""
+        position = self._positions[team_name]
+        start = max(0, position - radius)
+        return [
+            (start + offset + 1, team, score)
+            for offset, (team, score) in enumerate(self._ranked[start:position + radius + 1])
+        ]
+
+# ==================== SCORING ====================
+class ScoringEngine:
+    """Turns a revealed question's answers into per-team score deltas.
+    
+    Strategies:
+      flat             - full points for every correct answer
+      linear           - points decay linearly over the time limit, down to `min_fraction`
+      first_n          - full points, plus `bonus_points` for the `bonus_teams` fastest correct answers
+      double_or_nothing - correct answers double the team's score, wrong answers reset it to zero
+    
+    A question can pick its own strategy with a 'scoring' key, otherwise the
+    engine default applies.
+    """
+    
+    STRATEGIES = ('flat', 'linear', 'first_n', 'double_or_nothing')
+    
+    def __init__(self, strategy: str = 'flat', min_fraction: float = 0.5,
+                 bonus_teams: int = 3, bonus_points: int = 50):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown scoring strategy: {strategy}")
+        
+        self.strategy = strategy
+        self.min_fraction = min_fraction
+        self.bonus_teams = bonus_teams
+        self.bonus_points = bonus_points
+    
+    def deltas(self, question: dict, answers: 'AnswerSheet', team_names: list,
+               scores: Leaderboard, time_limit: float) -> Dict[str, int]:
+        """Score deltas keyed by team name, computed in one pass over the answer arrays"""
+        strategy = question.get('scoring', self.strategy)
+        correct = question['correct']
+        points = question.get('points', 0)
+        no_answer = AnswerSheet.NO_ANSWER
+        decay = (1 - self.min_fraction) / time_limit if time_limit else 0
+        
+        deltas = {}
+        fastest = []
+        for index, (choice, elapsed) in enumerate(zip(answers.choices, answers.elapsed)):
+            if choice == no_answer:
+                continue
+            
+            team_name = team_names[index]
+            if strategy == 'double_or_nothing':
+                # Same magnitude either way: won back on a correct answer, lost on a wrong one
+                current = scores.score(team_name)
+                deltas[team_name] = current if choice == correct else -current
+            elif choice != correct:
+                continue
+            elif strategy == 'linear':
+                deltas[team_name] = round(points * (1 - decay * min(elapsed, time_limit)))
+            else:
+                deltas[team_name] = points
+                if strategy == 'first_n':
+                    fastest.append((elapsed, team_name))
+        
+        for _, team_name in heapq.nsmallest(self.bonus_teams, fastest):
+            deltas[team_name] += self.bonus_points
+        return deltas
 
 # ==================== TRIVIA GAME STATE ====================
-game_state = {
-    'current_question': 0,
-    'game_active': False,
-    'question_start_time': None,
-    'question_time_limit': 30,
-    'intermission_start_time': None,
-    'intermission_time_limit': 30,
-    'teams': {},
-    'scores': {},
-    'answers_locked': False,
-    'in_intermission': False,
-    'show_answer': False
-}
-
-# Complete trivia questions with all 15 questions
-trivia_questions = [
-    # Round 1: Culture Club
-    {
-        'category': 'Culture Club - Vietnam',
-        'question': 'What is the name of the traditional Vietnamese dress worn at weddings and formal events?',
-        'options': ['Kimono', 'Ao Dai', 'Hanbok', 'Sari'],
-        'correct': 1,
-        'points': 100
-    },
-    {
-        'category': 'Culture Club - India',
-        'question': 'What spice is commonly used in Indian chai?',
-        'options': ['Cumin', 'Paprika', 'Cardamom', 'Ginger'],
-        'correct': 2,
-        'points': 100
-    },
-    {
-        'category': 'Culture Club - Canada',
-        'question': 'What sweet treat is made from snow and maple syrup in Canada?',
-        'options': ['Beaver Tail', 'Maple Taffy', 'Sugar Pancake', 'Frozen Syrup Pop'],
-        'correct': 1,
-        'points': 100
-    },
-    {
-        'category': 'Culture Club - USA',
-        'question': 'Which U.S. state has the largest Vietnamese population?',
-        'options': ['Texas', 'New York', 'Washington', 'California'],
-        'correct': 3,
-        'points': 100
-    },
-    {
-        'category': 'Culture Club - Geography',
-        'question': 'Put these in order of population (most to least): India, Vietnam, Canada',
-        'options': ['India > Canada > Vietnam', 'Vietnam > India > Canada', 'India > Vietnam > Canada', 'Canada > India > Vietnam'],
-        'correct': 2,
-        'points': 150
-    },
-    # Round 2: Nangie or Nah?
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who had a pet dog named Sushi growing up?',
-        'options': ['Navneet', 'Angie', 'Both', 'Neither'],
-        'correct': 1,
-        'points': 150
-    },
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who was once part of a competitive dance team?',
-        'options': ['Navneet', 'Angie', 'Both', 'Neither'],
-        'correct': 3,
-        'points': 150
-    },
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who owns more tech gadgets?',
-        'options': ['Navneet', 'Angie', 'Both', 'Sushi'],
-        'correct': 0,
-        'points': 150
-    },
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who is more likely to cry during a Disney movie?',
-        'options': ['Navneet', 'Angie', 'Both', 'Neither'],
-        'correct': 1,
-        'points': 150
-    },
-    {
-        'category': 'Nangie or Nah?',
-        'question': 'Who said "I love you" first?',
-        'options': ['Navneet', 'Angie', 'Both at the same time', 'No one remembers'],
-        'correct': 1,  # Update with real answer
-        'points': 200
-    },
-    # Round 3: Wedding Whirlwind
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'What flower is traditionally thrown at Indian weddings for blessings?',
-        'options': ['Lotus', 'Jasmine', 'Marigold', 'Rose'],
-        'correct': 3,
-        'points': 200
-    },
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'Which of these fruits is commonly found in Vietnamese wedding baskets?',
-        'options': ['Apple', 'Mango', 'Blueberry', 'Kiwi'],
-        'correct': 1,
-        'points': 200
-    },
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'In which language is "I love you" said as "Anh yêu em"?',
-        'options': ['Tagalog', 'Thai', 'Vietnamese', 'Lao'],
-        'correct': 2,
-        'points': 200
-    },
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'Which Bollywood movie is famously about a big Indian wedding?',
-        'options': ['Lagaan', 'Monsoon Wedding', 'Slumdog Millionaire', 'Chennai Express'],
-        'correct': 1,
-        'points': 250
-    },
-    {
-        'category': 'Wedding Whirlwind',
-        'question': 'What does "Namaste" literally mean?',
-        'options': ['Hello', 'I respect you', 'I bow to you', 'Let\'s eat'],
-        'correct': 2,
-        'points': 250
-    },
-    {
-        'category': 'Know the Couple',
-        'question': 'Where did the bride and groom meet?',
-        'options': ['At work', 'Through mutual friends', 'Online dating app', 'College'],
-        'correct': 2,  # Update with correct answer
-        'points': 300
-    },
-    {
-        'category': 'Know the Couple',
-        'question': 'Where did the proposal happen?',
-        'options': ['San Francisco', 'San Luis Obispo', 'San Diego', 'Santa Barbara'],
-        'correct': 1,
-        'points': 300
-    },
-
-    # Final Double or Nothing
-    {
-        'category': 'Double or Nothing',
-        'question': 'What exact date did the bride and groom meet?',
-        'options': ['April 26th, 2022', 'April 28th, 2022', 'May 2nd, 2022', 'April 30th, 2022'],
-        'correct': 1,
-        'points': 500  # or whatever max points you want
-    }
-]
+class GameError(Exception):
+    """A game action that is not allowed in the current state, reported as a 400"""
+
+@dataclass(slots=True)
+class Team:
+    id: int
+    name: str
+    joined_at: str
+
+@dataclass(slots=True)
+class Answer:
+    team_id: int
+    answer: int
+    elapsed: float  # Seconds after the question started, on the monotonic clock
+
+class AnswerSheet:
+    """Answers to a single question, stored as flat arrays indexed by team id"""
+    
+    __slots__ = ('choices', 'elapsed', 'scored')
+    
+    NO_ANSWER = -1
+    
+    def __init__(self, team_count: int = 0):
+        self.choices = array('h', [self.NO_ANSWER]) * team_count
+        self.elapsed = array('d', [0.0]) * team_count
+        self.scored = False
+    
+    def __iter__(self):
+        for index, choice in enumerate(self.choices):
+            if choice != self.NO_ANSWER:
+                yield Answer(index + 1, choice, self.elapsed[index])
+    
+    def record(self, team_id: int, answer: int, elapsed: float, replace: bool = True) -> bool:
+        """Store a team's answer, returns False if one exists and `replace` is off"""
+        index = team_id - 1
+        missing = index + 1 - len(self.choices)
+        if missing > 0:
+            # Team joined after the question started
+            self.choices.extend([self.NO_ANSWER] * missing)
+            self.elapsed.extend([0.0] * missing)
+        
+        if self.choices[index] != self.NO_ANSWER and not replace:
+            return False
+        
+        self.choices[index] = answer
+        self.elapsed[index] = elapsed
+        return True
+
+class GameState:
+    """State of one trivia game, only changed through its transition methods"""
+    
+    __slots__ = (
+        'questions', 'scoring', 'resubmit_policy', 'current_question', 'game_active',
+        'question_start_time', 'question_started_at', 'question_time_limit',
+        'intermission_start_time', 'intermission_time_limit',
+        'teams', 'team_names', 'scores', 'answers', 'score_deltas',
+        'answers_locked', 'in_intermission', 'show_answer', 'epoch', 'version', 'journal', 'bank_loader',
+    )
+    
+    RESUBMIT_POLICIES = ('first', 'last')
+    
+    def __init__(self, questions: QuestionBank, question_time_limit: int = 30, intermission_time_limit: int = 30,
+                 resubmit_policy: str = 'last', scoring: Optional[ScoringEngine] = None):
+        if resubmit_policy not in self.RESUBMIT_POLICIES:
+            raise ValueError(f"Unknown resubmit policy: {resubmit_policy}")
+        
+        self.questions = questions
+        self.scoring = scoring or ScoringEngine()
+        self.journal = None  # Called with (event_type, fields) after each transition
+        self.bank_loader = None  # Called with a bank name to replay or sync load_questions
+        self.resubmit_policy = resubmit_policy
+        self.question_time_limit = question_time_limit
+        self.intermission_time_limit = intermission_time_limit
+        self.version = 0  # Bumped on every published transition, never reset
+        # Versions restart at 0 with a new state, so a version is only meaningful with its epoch
+        self.epoch = secrets.token_hex(4)
+        self.reset()
+    
+    # Transitions that are journaled and can be replayed with apply_event()
+    JOURNALED = ('register_team', 'start_question', 'submit_answer', 'reveal_answer',
+                 'next_question', 'end_intermission', 'reset', 'load_questions')
+    
+    # Journaled transitions that are not published (GameRoom.publish) on their own
+    UNPUBLISHED = ('submit_answer',)
+    
+    def _record(self, event_type: str, **fields):
+        if self.journal is not None:
+            self.journal(event_type, fields)
+    
+    def apply_event(self, event: dict):
+        """Replay a journaled transition, bumping the version as publishing it did"""
+        event_type = event['type']
+        if event_type not in self.JOURNALED:
+            raise ValueError(f"Unknown game event: {event_type}")
+        
+        fields = {key: value for key, value in event.items() if key not in ('seq', 'at', 'type')}
+        journal, self.journal = self.journal, None
+        try:
+            getattr(self, event_type)(**fields)
+        finally:
+            self.journal = journal
+        
+        if event_type not in self.UNPUBLISHED:
+            self.version += 1
+    
+    def reset(self):
+        """Clear teams, scores and progress, keeping the configuration"""
+        self._clear()
+        self._record('reset')
+    
+    def _clear(self):
+        self.current_question = 0
+        self.game_active = False
+        self.question_start_time = None
+        self.question_started_at = None
+        self.intermission_start_time = None
+        self.teams: Dict[str, Team] = {}
+        self.team_names = []  # Indexed by team id - 1
+        self.scores = Leaderboard()
+        self.answers = AnswerSheet()
+        self.score_deltas = {}  # Per-team changes from the last reveal
+        self.answers_locked = False
+        self.in_intermission = False
+        self.show_answer = False
+    
+    def load_questions(self, name: str, bank: Optional[QuestionBank] = None):
+        """Switch to another question bank and start over; `bank` is loaded by name if not given"""
+        if self.game_active:
+            raise GameError("Cannot change questions during a game")
+        
+        self.questions = bank if bank is not None else self._load_bank(name)
+        self._clear()
+        self._record('load_questions', name=name)
+    
+    def _load_bank(self, name: str) -> QuestionBank:
+        if self.bank_loader is None:
+            raise ValueError(f"No loader for question bank {name!r}")
+        return self.bank_loader(name)
+    
+    @property
+    def finished(self) -> bool:
+        return self.current_question >= len(self.questions)
+    
+    @property
+    def question(self) -> Optional[dict]:
+        if self.finished:
+            return None
+        return self.questions[self.current_question]
+    
+    @property
+    def question_deadline(self) -> Optional[float]:
+        if self.question_start_time is None:
+            return None
+        return self.question_start_time + self.question_time_limit
+    
+    @property
+    def intermission_deadline(self) -> Optional[float]:
+        if self.intermission_start_time is None:
+            return None
+        return self.intermission_start_time + self.intermission_time_limit
+    
+    def next_deadline(self) -> Optional[float]:
+        """When the next timed transition is due, None if nothing is pending"""
+        if self.in_intermission:
+            return self.intermission_deadline
+        if self.game_active and not self.answers_locked:
+            return self.question_deadline
+        return None
+    
+    def snapshot(self) -> dict:
+        """JSON-serializable copy of the state, used by the state stores"""
+        return {
+            'epoch': self.epoch,
+            'version': self.version,
+            'question_bank': self.questions.name,
+            'current_question': self.current_question,
+            'game_active': self.game_active,
+            'question_start_time': self.question_start_time,
+            'question_time_limit': self.question_time_limit,
+            'intermission_start_time': self.intermission_start_time,
+            'intermission_time_limit': self.intermission_time_limit,
+            'teams': [[team.id, team.name, team.joined_at] for team in self.teams.values()],
+            'scores': self.scores.scores(),
+            'answers': {
+                'choices': self.answers.choices.tolist(),
+                'elapsed': self.answers.elapsed.tolist(),
+                'scored': self.answers.scored
+            },
+            'score_deltas': self.score_deltas,
+            'answers_locked': self.answers_locked,
+            'in_intermission': self.in_intermission,
+            'show_answer': self.show_answer
+        }
+    
+    def snapshot_after(self, event_type: str) -> dict:
+        """snapshot() for a journal entry: the transition that was just journaled is
+        published only afterwards, so the version is the one replaying it gives"""
+        snapshot = self.snapshot()
+        if event_type not in self.UNPUBLISHED:
+            snapshot['version'] += 1
+        return snapshot
+    
+    def restore(self, snapshot: dict):
+        """Replace the state in place with a snapshot() taken in this or another process"""
+        bank_name = snapshot.get('question_bank', self.questions.name)
+        if bank_name != self.questions.name:
+            self.questions = self._load_bank(bank_name)
+        
+        self.epoch = snapshot.get('epoch', self.epoch)
+        self.version = snapshot['version']
+        self.current_question = snapshot['current_question']
+        self.game_active = snapshot['game_active']
+        self.question_start_time = snapshot['question_start_time']
+        self.question_time_limit = snapshot['question_time_limit']
+        self.intermission_start_time = snapshot['intermission_start_time']
+        self.intermission_time_limit = snapshot['intermission_time_limit']
+        
+        # Monotonic clocks are per process, so map the start time from the wall clock
+        self.question_started_at = None
+        if self.question_start_time is not None:
+            self.question_started_at = time.monotonic() - (time.time() - self.question_start_time)
+        
+        self.teams = {name: Team(team_id, name, joined_at) for team_id, name, joined_at in snapshot['teams']}
+        self.team_names = [name for _, name, _ in snapshot['teams']]
+        self.scores = Leaderboard.from_scores([tuple(pair) for pair in snapshot['scores']])
+        
+        answers = AnswerSheet()
+        answers.choices = array('h', snapshot['answers']['choices'])
+        answers.elapsed = array('d', snapshot['answers']['elapsed'])
+        answers.scored = snapshot['answers']['scored']
+        self.answers = answers
+        
+        self.score_deltas = snapshot['score_deltas']
+        self.answers_locked = snapshot['answers_locked']
+        self.in_intermission = snapshot['in_intermission']
+        self.show_answer = snapshot['show_answer']
+    
+    def register_team(self, team_name: str, joined_at: Optional[str] = None) -> Team:
+        if not team_name:
+            raise GameError("Team name required")
+        if team_name in self.teams:
+            raise GameError("Team name already taken")
+        
+        team = Team(len(self.team_names) + 1, team_name, joined_at or datetime.now().isoformat())
+        self.teams[team_name] = team
+        self.team_names.append(team_name)
+        self.scores.add_team(team_name)
+        self._record('register_team', team_name=team_name, joined_at=team.joined_at)
+        return team
+    
+    def start_question(self, now: float):
+        if self.finished:
+            raise GameError("No more questions")
+        
+        self.game_active = True
+        self.question_start_time = now
+        # Mapped from `now` so replayed questions keep their original start
+        self.question_started_at = time.monotonic() - (time.time() - now)
+        self.answers_locked = False
+        self.in_intermission = False
+        self.show_answer = False
+        self.answers = AnswerSheet(len(self.team_names))
+        self.score_deltas = {}
+        self._record('start_question', now=now)
+    
+    def submit_answer(self, team_name: str, answer: int, elapsed: Optional[float] = None):
+        """Record an answer, timed on the server's monotonic clock unless `elapsed` is given"""
+        if elapsed is None:
+            elapsed = time.monotonic() - self.question_started_at if self.question_started_at else 0.0
+        
+        # The clock may not have locked answers yet right at the deadline
+        if not self.game_active or self.answers_locked or elapsed > self.question_time_limit:
+            raise GameError("Answers are locked")
+        
+        team = self.teams.get(team_name)
+        if team is None:
+            raise GameError("Team not registered")
+        if not 0 <= answer < len(self.question['options']):
+            raise GameError("Invalid answer")
+        
+        if not self.answers.record(team.id, answer, elapsed, replace=self.resubmit_policy == 'last'):
+            raise GameError("Answer already submitted")
+        self._record('submit_answer', team_name=team_name, answer=answer, elapsed=elapsed)
+    
+    def reveal_answer(self) -> list:
+        """Lock answers, show the correct one and score it, returns the correct teams
+        
+        Scores are applied once per question, so a manual reveal after the
+        automatic one does not score twice.
+        """
+        correct_teams = []
+        question = self.question
+        
+        if question is not None:
+            for answer in self.answers:
+                if answer.answer == question['correct']:
+                    correct_teams.append(self.team_names[answer.team_id - 1])
+            
+            if not self.answers.scored:
+                self.score_deltas = self.scoring.deltas(
+                    question, self.answers, self.team_names, self.scores, self.question_time_limit)
+                self.scores.apply(self.score_deltas)
+                self.answers.scored = True
+        
+        self.answers_locked = True
+        self.show_answer = True
+        self._record('reveal_answer')
+        return correct_teams
+    
+    def next_question(self):
+        self.current_question += 1
+        self.game_active = False
+        self.answers_locked = False
+        self.in_intermission = False
+        self.show_answer = False
+        self._record('next_question')
+    
+    def end_intermission(self):
+        self.in_intermission = False
+        self.show_answer = False
+        self.current_question += 1
+        if self.finished:
+            self.game_active = False
+        self._record('end_intermission')
+
+# Seconds between keep-alive comments on idle status streams
+STREAM_KEEPALIVE = 15
+
+# Upper bound for ?wait= on long-polling status requests
+LONG_POLL_MAX_WAIT = 30
+
+# Question banks are JSON/YAML files (or directories of them) in QUESTION_BANK_DIR;
+# QUESTION_BANK names the one new rooms start with
+QUESTION_BANK_DIR = os.getenv("QUESTION_BANK_DIR", "game/questions")
+
+def load_bank(name: str) -> QuestionBank:
+    return load_question_bank(QUESTION_BANK_DIR, name, ScoringEngine.STRATEGIES)
+
+# Banks are immutable, so every room starting with the default one shares it
+default_bank = load_bank(os.getenv("QUESTION_BANK", "wedding"))
+
+def new_game_state(bank: QuestionBank) -> GameState:
+    state = GameState(
+        bank,
+        resubmit_policy=os.getenv("ANSWER_RESUBMIT_POLICY", "last"),
+        scoring=ScoringEngine(os.getenv("SCORING_STRATEGY", "flat"))
+    )
+    state.bank_loader = load_bank
+    return state
+
+# Where the authoritative state lives: "memory" for a single worker, or
+# "sqlite:///path/to/game.db" to share games between several workers.
+# Every transition runs inside room.store.transaction(), which serializes it
+# (across workers too) and persists the result.
+GAME_STATE_STORE = os.getenv("GAME_STATE_STORE", "memory")
+
+# Optional append-only log of every transition (GAME_EVENT_LOG=/path/to/events.jsonl),
+# replayed when a room opens to recover from a crash. Workers sharing a SQLite
+# store share the log too, each writing inside the store's write transaction.
+GAME_EVENT_LOG = os.getenv("GAME_EVENT_LOG")
+
+# ==================== GAME ROOMS ====================
+# Every room is a separate game with its own state, question bank, store,
+# event log, clock and stream subscribers. The default room is served at
+# /game/..., room "abc" at /game/abc/...
+DEFAULT_ROOM = "main"
+
+ROOM_CODE_PATTERN = re.compile(r'[a-z0-9][a-z0-9-]{0,31}')
+
+# Paths under /game that a room code would shadow
+RESERVED_ROOM_CODES = {'api', 'play', 'admin', 'qr', 'papa', 'projector', 'rooms'}
+
+def is_valid_room_code(code: str) -> bool:
+    return bool(ROOM_CODE_PATTERN.fullmatch(code)) and code not in RESERVED_ROOM_CODES
+
+def room_file(path: str, room_code: str) -> str:
+    """A room's own copy of a store or log file: game.db is game.abc.db for room "abc"."""
+    if room_code == DEFAULT_ROOM:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{room_code}{ext}"
+
+def room_store_url(room_code: str) -> str:
+    if GAME_STATE_STORE.startswith('sqlite:///'):
+        return 'sqlite:///' + room_file(GAME_STATE_STORE[len('sqlite:///'):], room_code)
+    return GAME_STATE_STORE
+
+# Status payloads served from the per-version cache, or rebuilt
+_STATUS_CACHE_HIT = metrics.CACHE_REQUESTS.labels('game_status', 'hit')
+_STATUS_CACHE_MISS = metrics.CACHE_REQUESTS.labels('game_status', 'miss')
+
+class GameRoom:
+    """One game and everything that runs for it"""
+    
+    def __init__(self, code: str, state: GameState, store, log=None):
+        self.code = code
+        self.state = state
+        self.store = store
+        self.log = log
+        self.last_active = time.monotonic()
+        
+        # Each connected client owns a single-slot queue: a slow reader only ever
+        # sees the latest snapshot instead of a growing backlog.
+        self.subscribers = set()
+        
+        # Replaced on every publish; long-pollers wait on the one current at the time
+        self.changed = asyncio.Event()
+        
+        self._status_cache = {'version': None, 'prefix': None, 'question_deadline': None, 'intermission_deadline': None}
+        self._tasks = []
+        self._log_task = None
+        
+        if log:
+            state.journal = lambda event_type, fields: log.append(event_type, fields, state)
+    
+    @property
+    def base_path(self) -> str:
+        return "/game" if self.code == DEFAULT_ROOM else f"/game/{self.code}"
+    
+    def touch(self):
+        self.last_active = time.monotonic()
+    
+    @property
+    def in_progress(self) -> bool:
+        """Whether teams are playing, or a question is running, in an unfinished game"""
+        return (bool(self.state.teams) or self.state.game_active) and not self.state.finished
+    
+    def start(self):
+        """Restore the state and start the clock, store watcher and event log writer"""
+        restored = self.store.load(self.state)
+        
+        if self.log:
+            if restored:
+                # The store already has the state; the log only carries on after its last event
+                self.log.open()
+            else:
+                journal, self.state.journal = self.state.journal, None
+                replayed = self.log.replay(self.state)
+                self.state.journal = journal
+                print(f"Replayed {replayed} game events from {self.log.path}")
+            self._log_task = asyncio.create_task(self.log.run())
+        
+        self._tasks = [
+            asyncio.create_task(self.run_clock()),
+            asyncio.create_task(self.store.watch(self.state, self.notify)),
+        ]
+    
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self.store.close()
+        
+        if self._log_task:
+            # Cancelling flushes whatever is still buffered, unless the writer never got to run
+            self._log_task.cancel()
+            await asyncio.gather(self._log_task, return_exceptions=True)
+            self._log_task = None
+            await self.log.flush()
+            self.log.close()
+    
+    # ---------- Status ----------
+    def publish(self):
+        """Bump the state version and notify every stream and long-poll waiter"""
+        self.state.version += 1
+        self.notify()
+    
+    def notify(self):
+        """Notify streams and long-poll waiters of a new version, including one loaded from the store"""
+        self.changed.set()
+        self.changed = asyncio.Event()
+        
+        if not self.subscribers:
+            return
+        
+        snapshot = self.status_body()
+        for queue in list(self.subscribers):
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(snapshot)
+    
+    def _status_prefix(self) -> bytes:
+        """Version-dependent part of the status payload as JSON without its closing brace,
+        rebuilt only when the version changes"""
+        state = self.state
+        cache = self._status_cache
+        if cache['version'] == state.version:
+            _STATUS_CACHE_HIT.inc()
+            return cache['prefix']
+        _STATUS_CACHE_MISS.inc()
+        
+        question = b'null'
+        question_deadline = None
+        intermission_deadline = None
+        
+        if state.in_intermission:
+            intermission_deadline = state.intermission_deadline
+        
+        elif state.game_active and not state.finished:
+            hidden, revealed = state.questions.payloads[state.current_question]
+            question_deadline = state.question_deadline
+            
+            # Include correct answer if showing answer
+            question = revealed if state.show_answer else hidden
+        
+        fields = {
+            'epoch': state.epoch,
+            'version': state.version,
+            'game_active': state.game_active,
+            'current_question': state.current_question,
+            'total_questions': len(state.questions),
+            'question_deadline': question_deadline,
+            'intermission_deadline': intermission_deadline,
+            'in_intermission': state.in_intermission,
+            'show_answer': state.show_answer,
+            'answers_locked': state.answers_locked,
+            'teams_count': len(state.teams),
+            'current_scores': state.scores.ranked(),  # Add scores to every status response
+            'score_deltas': state.score_deltas if state.show_answer else {}
+        }
+        prefix = b'{"question":' + question + b',' + orjson.dumps(fields)[1:-1]
+        cache.update(
+            version=state.version,
+            prefix=prefix,
+            question_deadline=question_deadline,
+            intermission_deadline=intermission_deadline
+        )
+        return prefix
+    
+    def status_body(self) -> bytes:
+        """The public game status as JSON, without mutating state"""
+        prefix = self._status_prefix()
+        now = time.time()
+        
+        question_deadline = self._status_cache['question_deadline']
+        intermission_deadline = self._status_cache['intermission_deadline']
+        time_remaining = max(0, question_deadline - now) if question_deadline else 0
+        intermission_time = max(0, intermission_deadline - now) if intermission_deadline else 0
+        return b'%s,"server_time":%.3f,"time_remaining":%.3f,"intermission_time":%.3f}' % (
+            prefix, now, time_remaining, intermission_time)
+    
+    def status_etag(self) -> str:
+        # Weak: the body also carries live countdowns, which clients derive from the deadlines
+        return f'W/"{self.state.epoch}-{self.state.version}"'
+    
+    def is_current(self, epoch: Optional[str], version: int) -> bool:
+        """True if a client's epoch and version are still the latest status"""
+        return epoch == self.state.epoch and version == self.state.version
+    
+    async def wait_for_change(self, epoch: Optional[str], since: int, wait: float):
+        """Block until the status moves past epoch/`since` or `wait` seconds elapse"""
+        deadline = time.monotonic() + wait
+        
+        while self.is_current(epoch, since):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            
+            changed = self.changed
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return
+    
+    async def status_events(self):
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        try:
+            yield _sse_message(self.status_body())
+            
+            while True:
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                
+                yield _sse_message(snapshot)
+        finally:
+            self.subscribers.discard(queue)
+            self.touch()
+    
+    # ---------- Clock ----------
+    def advance_clock(self) -> bool:
+        """Apply any time-based transitions that are due, returns True if state changed"""
+        state = self.state
+        now = time.time()
+        changed = False
+        
+        if state.in_intermission:
+            deadline = state.intermission_deadline
+            if deadline is not None and deadline <= now:
+                state.end_intermission()
+                changed = True
+        
+        elif state.game_active and not state.answers_locked and not state.finished:
+            deadline = state.question_deadline
+            
+            # AUTO-SHOW ANSWER AND SCORE WHEN TIME HITS ZERO
+            if deadline is not None and deadline <= now:
+                state.reveal_answer()
+                changed = True
+        
+        if changed:
+            self.publish()
+        return changed
+    
+    def next_transition_in(self) -> Optional[float]:
+        """Seconds until the next time-based transition, None if nothing is pending"""
+        deadline = self.state.next_deadline()
+        if deadline is None:
+            return None
+        return max(0, deadline - time.time())
+    
+    async def run_clock(self):
+        """Apply timed transitions (answer lock and reveal, end of intermission) at their deadlines"""
+        while True:
+            # Any published transition may move the next deadline, so re-plan on each one
+            changed = self.changed
+            timeout = self.next_transition_in()
+            
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                try:
+                    async with self.store.transaction(self.state):
+                        self.advance_clock()
+                except Exception as e:
+                    print(f"Error advancing game clock in room {self.code}: {str(e)}")
+
+def _sse_message(snapshot: bytes) -> bytes:
+    return b"data: " + snapshot + b"\n\n"
+
+class GameRooms:
+    """Open rooms by code, closing the least recently used idle ones first.
+    
+    A room is closed once no request has touched it for idle_ttl seconds. When
+    max_rooms are open and another one is needed, the least recently used room
+    without a game in progress that nobody has touched for evict_after seconds
+    makes way; if there is none, the new room is refused with a 503. Rooms with
+    open status streams and the default room are never closed. A closed room
+    whose store or event log persists is reopened from it on its next request.
+    """
+    
+    def __init__(self, max_rooms: int = 50, idle_ttl: float = 6 * 3600, evict_after: float = 300):
+        self.max_rooms = max_rooms
+        self.idle_ttl = idle_ttl
+        self.evict_after = evict_after
+        self._rooms = OrderedDict()
+        self._closing = {}
+    
+    def __len__(self) -> int:
+        return len(self._rooms)
+    
+    def __iter__(self):
+        return iter(list(self._rooms.values()))
+    
+    def _persisted(self, code: str) -> bool:
+        store_url = room_store_url(code)
+        if store_url.startswith('sqlite:///') and os.path.exists(store_url[len('sqlite:///'):]):
+            return True
+        return bool(GAME_EVENT_LOG) and os.path.exists(room_file(GAME_EVENT_LOG, code))
+    
+    async def _open(self, code: str, bank: QuestionBank) -> GameRoom:
+        # A room being closed must finish writing its log before it is read back
+        if code in self._closing:
+            await asyncio.gather(self._closing[code], return_exceptions=True)
+            # Another request waiting on the same close may have reopened it meanwhile
+            room = self._rooms.get(code)
+            if room is not None:
+                return room
+        
+        cutoff = time.monotonic() - self.evict_after
+        for room in self._closable():
+            if len(self._rooms) < self.max_rooms:
+                break
+            if not room.in_progress and room.last_active < cutoff:
+                self._close(room)
+        if len(self._rooms) >= self.max_rooms:
+            raise HTTPException(status_code=503, detail="Too many game rooms are open")
+        
+        room = GameRoom(
+            code,
+            new_game_state(bank),
+            open_state_store(room_store_url(code), rejections=(GameError,)),
+            open_event_log(room_file(GAME_EVENT_LOG, code) if GAME_EVENT_LOG else None,
+                           shared=GAME_STATE_STORE != 'memory')
+        )
+        room.start()
+        self._rooms[code] = room
+        return room
+    
+    async def get(self, code: str) -> Optional[GameRoom]:
+        """The room with this code, reopened if it was closed, None if there is none"""
+        room = self._rooms.get(code)
+        if room is None:
+            if code != DEFAULT_ROOM and not self._persisted(code):
+                return None
+            room = await self._open(code, default_bank)
+        
+        self._rooms.move_to_end(code)
+        room.touch()
+        return room
+    
+    async def create(self, code: str, bank: QuestionBank) -> GameRoom:
+        if code in self._rooms or self._persisted(code):
+            raise GameError(f"Room {code} already exists")
+        return await self._open(code, bank)
+    
+    def _closable(self) -> list:
+        """Rooms that may be closed, least recently used first"""
+        return [room for code, room in self._rooms.items() if code != DEFAULT_ROOM and not room.subscribers]
+    
+    def _close(self, room: GameRoom):
+        del self._rooms[room.code]
+        task = asyncio.create_task(room.close())
+        self._closing[room.code] = task
+        
+        def closed(_):
+            if self._closing.get(room.code) is task:
+                del self._closing[room.code]
+        task.add_done_callback(closed)
+    
+    def close_idle(self) -> int:
+        """Close rooms idle for longer than idle_ttl, returns how many were closed"""
+        cutoff = time.monotonic() - self.idle_ttl
+        idle = [room for room in self._closable() if room.last_active < cutoff]
+        for room in idle:
+            self._close(room)
+        return len(idle)
+    
+    async def run(self):
+        """Close idle rooms periodically until cancelled"""
+        while True:
+            await asyncio.sleep(min(self.idle_ttl, 60))
+            closed = self.close_idle()
+            if closed:
+                print(f"Closed {closed} idle game rooms")
+    
+    async def close_all(self):
+        rooms = list(self._rooms.values())
+        self._rooms.clear()
+        await asyncio.gather(*(room.close() for room in rooms), *self._closing.values(), return_exceptions=True)
+
+game_rooms = GameRooms(
+    max_rooms=int(os.getenv("GAME_MAX_ROOMS", 50)),
+    idle_ttl=float(os.getenv("GAME_ROOM_IDLE_TTL", 6 * 3600)),
+    evict_after=float(os.getenv("GAME_ROOM_EVICT_AFTER", 300))
+)
 
 # ==================== YOUR EXISTING RSVP MODELS ====================
 class UserUpdate(BaseModel):
@@ -218,300 +995,469 @@ class AnswerSubmission(BaseModel):
     team_name: str
     answer: int
 
+class QuestionBankSelection(BaseModel):
+    name: str
+
+class RoomCreation(BaseModel):
+    room: str
+    question_bank: Optional[str] = None
+
 # ==================== YOUR EXISTING RSVP CODE ====================
 # (Keep all your existing Google Sheets functions here)
-_sheets_service = None
+SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
+SHEET_NAME = os.getenv("SHEET_NAME", "Sheet1")
 
-@contextmanager
-def get_sheets_service():
-    # Your existing implementation
-    pass
+# Sheets calls run on their own threads so RSVP traffic never blocks the game
+sheets_pool = SheetsPool(max_workers=int(os.getenv("SHEETS_MAX_CONCURRENCY", 4)))
 
-def find_user_row(service, spreadsheet_id: str, user_id: str) -> Optional[int]:
-    # Your existing implementation
-    pass
+# Access code -> row, rebuilt from the access code column every RSVP_CACHE_TTL seconds
+# and refreshed in the background so lookups are served from memory
+rsvp_index = RsvpIndex(
+    SPREADSHEET_ID,
+    f"{SHEET_NAME}!A:{chr(ord('A') + len(HEADERS) - 1)}",
+    HEADERS[0],
+    headers=HEADERS,
+    ttl=float(os.getenv("RSVP_CACHE_TTL", 300)),
+    stale_ttl=float(os.getenv("RSVP_STALE_TTL", 3600)),
+    negative_ttl=float(os.getenv("RSVP_NEGATIVE_TTL", 30))
+)
+# Shared secret for POST /rsvp/invalidate, sent as "Authorization: Bearer <token>";
+# the endpoint is disabled without one
+RSVP_ADMIN_TOKEN = os.getenv("RSVP_ADMIN_TOKEN")
+_rsvp_refresh_task = None
+
+# RSVP updates are acknowledged immediately and written in batches. On Lambda,
+# where a frozen container runs no background tasks, each update is written
+# before its response instead, retrying for at most RSVP_WRITE_BUDGET seconds
+# so a failure is reported within API Gateway's 29 second limit.
+RSVP_WRITE_THROUGH = os.getenv("RSVP_WRITE_THROUGH", "1" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "0") == "1"
+RSVP_WRITE_BUDGET = float(os.getenv("RSVP_WRITE_BUDGET", 8))
+rsvp_writes = RsvpWriteQueue(
+    SPREADSHEET_ID,
+    SHEET_NAME,
+    HEADERS,
+    rsvp_index,
+    flush_interval=float(os.getenv("RSVP_FLUSH_INTERVAL_MS", 500)) / 1000,
+    max_rows=int(os.getenv("RSVP_FLUSH_MAX_ROWS", 50))
+)
+_rsvp_writer_task = None
+
+async def find_user_row(spreadsheet_id: str, user_id: str) -> Optional[int]:
+    """Sheet row number for an access code, from the cached RSVP index"""
+    if spreadsheet_id != rsvp_index.spreadsheet_id:
+        raise ValueError(f"No RSVP index for spreadsheet {spreadsheet_id}")
+    
+    return await rsvp_index.find_row_async(sheets_pool, user_id)
 
 # ==================== YOUR EXISTING RSVP ROUTES ====================
 @app.get("/user/{user_id}")
 async def get_user(user_id: str) -> Dict[str, str]:
-    # Your existing implementation
-    pass
+    """Get a guest's RSVP record by access code"""
+    if not is_valid_code(user_id):
+        raise HTTPException(status_code=403, detail="Invalid code format")
+    
+    entry = await rsvp_index.lookup_async(sheets_pool, user_id)
+    
+    if entry is None:
+        raise HTTPException(status_code=404, detail="User not found, please check the code")
+    
+    row, record = entry
+    # Overlay updates that are still waiting to be written
+    return {**record, **rsvp_writes.pending(row)}
 
-@app.post("/update/{user_id}")
+@app.post("/update/{user_id}", status_code=202)
 async def update_user(user_id: str, update_data: UserUpdate) -> Dict[str, str]:
-    # Your existing implementation
-    pass
+    """Queue an RSVP update; it is written to the sheet in the next batch"""
+    if not is_valid_code(user_id):
+        raise HTTPException(status_code=403, detail="Invalid code format")
+    if HEADERS[0] in update_data.data:
+        raise HTTPException(status_code=400, detail=f"{HEADERS[0]} cannot be changed")
+    
+    row = await find_user_row(SPREADSHEET_ID, user_id)
+    
+    if row is None:
+        raise HTTPException(status_code=404, detail="User not found, please check the code")
+    
+    try:
+        rsvp_writes.enqueue(row, user_id, update_data.data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if RSVP_WRITE_THROUGH:
+        try:
+            written = await rsvp_writes.flush(sheets_pool, budget=RSVP_WRITE_BUDGET)
+        except Exception as e:
+            print(f"Error writing RSVP updates: {str(e)}")
+            raise HTTPException(status_code=503, detail="Could not save the RSVP, please try again")
+        if all(code != user_id for code, _ in written.values()):
+            raise HTTPException(status_code=502, detail="The RSVP was not saved")
+    
+    return {'status': 'accepted', 'accessCode': user_id}
+
+@app.post("/rsvp/invalidate")
+async def invalidate_rsvp_cache(authorization: Optional[str] = Header(None)):
+    """Drop the cached RSVP index so the next lookup re-reads the sheet"""
+    if not RSVP_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest((authorization or '').encode(), f"Bearer {RSVP_ADMIN_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    rsvp_index.invalidate()
+    return {'success': True}
 
 # ==================== NEW GAME ROUTES ====================
-@app.get("/game", response_class=HTMLResponse)
-async def game_home(request: Request):
+# Every game page and API route is served for the default room under /game and
+# for any other room under /game/{room_code}
+game_router = APIRouter()
+
+async def current_room(request: Request) -> GameRoom:
+    """The room a request is for, from its path"""
+    code = request.path_params.get('room_code', DEFAULT_ROOM)
+    room = await game_rooms.get(code) if is_valid_room_code(code) else None
+    if room is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return room
+
+def render_game_page(request: Request, template: str, room: GameRoom, **context):
+    return game_templates().TemplateResponse(template, {
+        "request": request,
+        "room_code": room.code,
+        "game_base": room.base_path,
+        **context
+    })
+
+@game_router.get("", response_class=HTMLResponse)
+async def game_home(request: Request, room: GameRoom = Depends(current_room)):
     """Game home page"""
-    return game_templates.TemplateResponse("index.html", {"request": request})
+    return render_game_page(request, "index.html", room)
 
-@app.get("/game/play", response_class=HTMLResponse)
-async def game_play(request: Request):
+@game_router.get("/play", response_class=HTMLResponse)
+async def game_play(request: Request, room: GameRoom = Depends(current_room)):
     """Team game interface"""
-    return game_templates.TemplateResponse("game.html", {"request": request})
+    return render_game_page(request, "game.html", room)
 
-@app.get("/game/admin", response_class=HTMLResponse)
-async def game_admin(request: Request):
+@game_router.get("/admin", response_class=HTMLResponse)
+async def game_admin(request: Request, room: GameRoom = Depends(current_room)):
     """Game admin interface"""
-    return game_templates.TemplateResponse("admin.html", {"request": request})
+    return render_game_page(request, "admin.html", room)
 
-@app.get("/game/qr", response_class=HTMLResponse)
-async def game_qr(request: Request):
+@game_router.get("/qr", response_class=HTMLResponse)
+async def game_qr(request: Request, room: GameRoom = Depends(current_room)):
     """QR code for teams to join"""
     # Use request info to build URL
     host = request.headers.get("host", "localhost:8000")
-    qr_url = f"http://{host}/game/play"
+    qr_url = f"http://{host}{room.base_path}/play"
     
-    try:
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(qr_url)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        
-        return game_templates.TemplateResponse("qr.html", {
-            "request": request, 
-            "qr_image": img_str, 
-            "qr_url": qr_url
-        })
-    except ImportError:
-        return game_templates.TemplateResponse("qr.html", {
-            "request": request, 
-            "qr_image": None, 
-            "qr_url": qr_url
-        })
+    return render_game_page(
+        request, "qr.html", room,
+        qr_src=f"{room.base_path}/qr.svg" if qr_codes.AVAILABLE else None,
+        qr_url=qr_url
+    )
+
+# Join URL QR codes, rendered once per host and room
+qr_cache = qr_codes.QRCodeCache()
+
+@game_router.get("/qr.{fmt}")
+async def game_qr_image(request: Request, fmt: str, room: GameRoom = Depends(current_room)):
+    """QR code image (png or svg) pointing at the team game page"""
+    if fmt not in qr_codes.MEDIA_TYPES or not qr_codes.AVAILABLE:
+        raise HTTPException(status_code=404, detail="Not Found")
+    
+    host = request.headers.get("host", "localhost:8000")
+    image, etag = await qr_cache.get(f"http://{host}{room.base_path}/play", fmt)
+    
+    headers = {'ETag': etag, 'Cache-Control': 'public, max-age=3600'}
+    if _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(image, media_type=qr_codes.MEDIA_TYPES[fmt], headers=headers)
 
 # ==================== GAME API ROUTES ====================
-@app.post("/game/api/register_team")
-async def register_team(team_data: TeamRegistration):
+@app.exception_handler(GameError)
+async def game_error_handler(request: Request, exc: GameError):
+    return JSONResponse(status_code=400, content={'detail': str(exc)})
+
+@game_router.post("/api/register_team")
+async def register_team(team_data: TeamRegistration, room: GameRoom = Depends(current_room)):
     """Register a new team"""
-    team_name = team_data.team_name.strip()
+    async with room.store.transaction(room.state):
+        team = room.state.register_team(team_data.team_name.strip())
+        room.publish()
+    metrics.TEAMS_REGISTERED.inc()
     
-    if not team_name:
-        raise HTTPException(status_code=400, detail="Team name required")
+    return {'success': True, 'team_id': team.id, 'team_name': team.name}
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag.removeprefix('W/') for tag in candidates)
+
+@game_router.get("/api/game_status")
+async def game_status(request: Request, since: Optional[int] = None, epoch: Optional[str] = None, wait: float = 0,
+                      room: GameRoom = Depends(current_room)):
+    """Get current game status (polling fallback for the stream)
     
-    if team_name in game_state['teams']:
-        raise HTTPException(status_code=400, detail="Team name already taken")
+    Supports If-None-Match against the state epoch and version, and long-polling with
+    ?epoch=<epoch>&since=<version>&wait=<seconds>, which returns 304 if nothing changed
+    in time. A version from another epoch (e.g. before a restart) is answered at once.
+    Timed transitions are applied by the game clock, so this is a pure read.
+    """
+    if since is not None and wait > 0:
+        await room.wait_for_change(epoch, since, min(wait, LONG_POLL_MAX_WAIT))
+        if room.is_current(epoch, since):
+            return Response(status_code=304, headers={'ETag': room.status_etag()})
     
-    team_id = len(game_state['teams']) + 1
-    game_state['teams'][team_name] = {
-        'id': team_id,
-        'name': team_name,
-        'joined_at': datetime.now().isoformat()
-    }
-    game_state['scores'][team_name] = 0
+    etag = room.status_etag()
+    if _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={'ETag': etag})
     
-    return {'success': True, 'team_id': team_id, 'team_name': team_name}
+    return Response(room.status_body(), media_type='application/json', headers={'ETag': etag, 'Cache-Control': 'no-cache'})
 
-@app.get("/game/api/game_status")
-async def game_status():
-    """Get current game status with auto score reveal"""
-    current_q = None
-    time_remaining = 0
-    intermission_time = 0
-    
-    if game_state['in_intermission']:
-        if game_state['intermission_start_time']:
-            elapsed = time.time() - game_state['intermission_start_time']
-            intermission_time = max(0, game_state['intermission_time_limit'] - elapsed)
-            
-            if intermission_time <= 0:
-                game_state['in_intermission'] = False
-                game_state['show_answer'] = False
-                game_state['current_question'] += 1
-                if game_state['current_question'] >= len(trivia_questions):
-                    game_state['game_active'] = False
-    
-    elif game_state['game_active'] and game_state['current_question'] < len(trivia_questions):
-        current_q = trivia_questions[game_state['current_question']].copy()
-        
-        if game_state['question_start_time']:
-            elapsed = time.time() - game_state['question_start_time']
-            time_remaining = max(0, game_state['question_time_limit'] - elapsed)
-            
-            # AUTO-SHOW ANSWER WHEN TIME HITS ZERO
-            if time_remaining <= 0 and not game_state['answers_locked']:
-                game_state['answers_locked'] = True
-                game_state['show_answer'] = True
-                
-                # Auto-calculate scores when time expires
-                if 'current_answers' in game_state:
-                    correct_answer = trivia_questions[game_state['current_question']]['correct']
-                    points = trivia_questions[game_state['current_question']]['points']
-                    
-                    for team_name, answer_data in game_state['current_answers'].items():
-                        if answer_data['answer'] == correct_answer:
-                            game_state['scores'][team_name] += points
-        
-        # Include correct answer if showing answer
-        if not game_state['show_answer']:
-            current_q.pop('correct', None)
-    
-    # Get current scores for chart display
-    sorted_scores = sorted(game_state['scores'].items(), key=lambda x: x[1], reverse=True)
-    
-    return {
-        'game_active': game_state['game_active'],
-        'current_question': game_state['current_question'],
-        'total_questions': len(trivia_questions),
-        'question': current_q,
-        'time_remaining': time_remaining,
-        'intermission_time': intermission_time,
-        'in_intermission': game_state['in_intermission'],
-        'show_answer': game_state['show_answer'],
-        'answers_locked': game_state['answers_locked'],
-        'teams_count': len(game_state['teams']),
-        'current_scores': sorted_scores  # Add scores to every status response
-    }
+# ==================== LIVE STATUS STREAM ====================
+@game_router.get("/api/game_stream")
+async def game_stream(room: GameRoom = Depends(current_room)):
+    """Server-Sent Events stream of status snapshots, pushed on every transition"""
+    return StreamingResponse(
+        room.status_events(),
+        media_type="text/event-stream",
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
-@app.get("/game/papa", response_class=HTMLResponse)
-async def game_projector(request: Request):
+@game_router.get("/papa", response_class=HTMLResponse)
+async def game_projector(request: Request, room: GameRoom = Depends(current_room)):
     """Projector display for questions"""
-    return game_templates.TemplateResponse("planes.html", {"request": request})
+    return render_game_page(request, "planes.html", room)
 
-@app.post("/game/api/submit_answer")
-async def submit_answer(answer_data: AnswerSubmission):
+@game_router.post("/api/submit_answer")
+async def submit_answer(answer_data: AnswerSubmission, room: GameRoom = Depends(current_room)):
     """Submit team answer"""
-    if not game_state['game_active'] or game_state['answers_locked']:
-        raise HTTPException(status_code=400, detail="Answers are locked")
-    
-    team_name = answer_data.team_name
-    answer = answer_data.answer
-    
-    if team_name not in game_state['teams']:
-        raise HTTPException(status_code=400, detail="Team not registered")
-    
-    if 'current_answers' not in game_state:
-        game_state['current_answers'] = {}
-    
-    game_state['current_answers'][team_name] = {
-        'answer': answer,
-        'timestamp': time.time()
-    }
+    async with room.store.transaction(room.state):
+        room.state.submit_answer(answer_data.team_name, answer_data.answer)
+    metrics.ANSWERS_SUBMITTED.inc()
     
     return {'success': True, 'message': 'Answer submitted'}
 
-@app.post("/game/api/start_question")
-async def start_question():
+@game_router.post("/api/start_question")
+async def start_question(room: GameRoom = Depends(current_room)):
     """Start the current question"""
-    if game_state['current_question'] >= len(trivia_questions):
-        raise HTTPException(status_code=400, detail="No more questions")
-    
-    # Start the current question
-    game_state['game_active'] = True
-    game_state['question_start_time'] = time.time()
-    game_state['answers_locked'] = False
-    game_state['in_intermission'] = False
-    game_state['show_answer'] = False
-    game_state['current_answers'] = {}
+    async with room.store.transaction(room.state):
+        room.state.start_question(time.time())
+        room.publish()
     
     return {
-        'success': True, 
-        'current_question': game_state['current_question'],
-        'message': f"Question {game_state['current_question'] + 1} started!"
+        'success': True,
+        'current_question': room.state.current_question,
+        'message': f"Question {room.state.current_question + 1} started!"
     }
 
-@app.post("/game/api/show_answer")
-async def show_answer():
+@game_router.post("/api/show_answer")
+async def show_answer(room: GameRoom = Depends(current_room)):
     """Show correct answer and calculate scores"""
-    correct_teams = []
-    
-    if 'current_answers' in game_state and game_state['current_question'] < len(trivia_questions):
-        correct_answer = trivia_questions[game_state['current_question']]['correct']
-        points = trivia_questions[game_state['current_question']]['points']
-        
-        # Calculate scores
-        for team_name, answer_data in game_state['current_answers'].items():
-            if answer_data['answer'] == correct_answer:
-                game_state['scores'][team_name] += points
-                correct_teams.append(team_name)
-    
-    # Lock answers and show correct answer
-    game_state['answers_locked'] = True
-    game_state['show_answer'] = True
-    
-    # Get current scores for response
-    sorted_scores = sorted(game_state['scores'].items(), key=lambda x: x[1], reverse=True)
+    async with room.store.transaction(room.state):
+        correct_teams = room.state.reveal_answer()
+        room.publish()
     
     return {
-        'success': True, 
+        'success': True,
         'correct_teams': correct_teams,
-        'current_scores': sorted_scores[:5]  # Top 5 scores
+        'score_deltas': room.state.score_deltas,
+        'current_scores': room.state.scores.top(5)  # Top 5 scores
     }
 
-@app.post("/game/api/next_question")
-async def next_question():
+@game_router.post("/api/next_question")
+async def next_question(room: GameRoom = Depends(current_room)):
     """Move to next question"""
-    # Move to next question
-    game_state['current_question'] += 1
-    
-    # Reset states
-    game_state['game_active'] = False
-    game_state['answers_locked'] = False
-    game_state['in_intermission'] = False
-    game_state['show_answer'] = False
+    async with room.store.transaction(room.state):
+        room.state.next_question()
+        room.publish()
     
     # Check if game is complete
-    if game_state['current_question'] >= len(trivia_questions):
-        game_state['game_active'] = False
+    if room.state.finished:
         return {
-            'success': True, 
-            'current_question': game_state['current_question'],
+            'success': True,
+            'current_question': room.state.current_question,
             'game_complete': True,
             'message': 'Game completed!'
         }
     
     return {
-        'success': True, 
-        'current_question': game_state['current_question'],
+        'success': True,
+        'current_question': room.state.current_question,
         'game_complete': False,
-        'message': f'Ready for question {game_state["current_question"] + 1}'
+        'message': f'Ready for question {room.state.current_question + 1}'
     }
 
-@app.get("/game/projector", response_class=HTMLResponse)
-async def game_projector(request: Request):
+@game_router.get("/api/export_events")
+async def export_events(room: GameRoom = Depends(current_room)):
+    """Download the game event log as JSON lines for post-event analysis"""
+    if not room.log:
+        raise HTTPException(status_code=404, detail="Event log is not enabled")
+    
+    await room.log.flush()
+    return FileResponse(room.log.path, media_type="application/x-ndjson", filename=f"game_events_{room.code}.jsonl")
+
+@game_router.get("/projector", response_class=HTMLResponse)
+async def game_projector(request: Request, room: GameRoom = Depends(current_room)):
     """Projector display for questions"""
-    return game_templates.TemplateResponse("projector.html", {"request": request})
+    return render_game_page(request, "projector.html", room)
 
-@app.get("/game/api/scores")
-async def get_scores():
+@game_router.get("/api/scores")
+async def get_scores(room: GameRoom = Depends(current_room)):
     """Get current scores"""
-    sorted_scores = sorted(game_state['scores'].items(), key=lambda x: x[1], reverse=True)
-    return {'scores': sorted_scores}
+    return Response(orjson.dumps({'scores': room.state.scores.ranked()}), media_type="application/json")
+
+@game_router.get("/api/team_rank/{team_name}")
+async def get_team_rank(team_name: str, around: int = 0, room: GameRoom = Depends(current_room)):
+    """Get one team's score and rank, optionally with its neighbours on the leaderboard"""
+    leaderboard = room.state.scores
+    if team_name not in leaderboard:
+        raise HTTPException(status_code=404, detail="Team not registered")
+    
+    return {
+        'team_name': team_name,
+        'score': leaderboard.score(team_name),
+        'rank': leaderboard.rank(team_name),
+        'teams_count': len(leaderboard),
+        'around': leaderboard.around(team_name, min(max(around, 0), 10))
+    }
+
+@game_router.get("/api/question_banks")
+async def get_question_banks(room: GameRoom = Depends(current_room)):
+    """Question banks available to load, and the one in use"""
+    return {'banks': list_banks(QUESTION_BANK_DIR), 'current': room.state.questions.name}
 
-@app.post("/game/api/reset_game")
-async def reset_game():
+@game_router.post("/api/load_questions")
+async def load_questions(selection: QuestionBankSelection, room: GameRoom = Depends(current_room)):
+    """Switch to another question bank between games"""
+    # Read and validated off the event loop; the swap itself is a single assignment
+    try:
+        bank = await asyncio.to_thread(load_bank, selection.name)
+    except QuestionBankError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async with room.store.transaction(room.state):
+        room.state.load_questions(selection.name, bank)
+        room.publish()
+    
+    return {'success': True, 'question_bank': bank.name, 'total_questions': len(bank)}
+
+@game_router.post("/api/reset_game")
+async def reset_game(room: GameRoom = Depends(current_room)):
     """Reset entire game"""
-    game_state.update({
-        'current_question': 0,
-        'game_active': False,
-        'question_start_time': None,
-        'intermission_start_time': None,
-        'teams': {},
-        'scores': {},
-        'answers_locked': False,
-        'in_intermission': False,
-        'show_answer': False,
-        'current_answers': {}
-    })
+    async with room.store.transaction(room.state):
+        room.state.reset()
+        room.publish()
     return {'success': True}
 
+# ==================== ROOM ROUTES ====================
+@app.get("/game/api/rooms")
+async def list_rooms():
+    """Rooms currently open in this worker"""
+    now = time.monotonic()
+    return {'rooms': [{
+        'room': room.code,
+        'url': room.base_path,
+        'question_bank': room.state.questions.name,
+        'teams_count': len(room.state.teams),
+        'game_active': room.state.game_active,
+        'streams': len(room.subscribers),
+        'idle_seconds': round(now - room.last_active, 1)
+    } for room in game_rooms]}
+
+@app.post("/game/api/rooms")
+async def create_room(room_data: RoomCreation):
+    """Open a new game room, optionally with its own question bank"""
+    code = room_data.room.strip().lower()
+    if not is_valid_room_code(code):
+        raise HTTPException(status_code=400, detail="Room codes are 1-32 lowercase letters, digits or dashes")
+    
+    bank = default_bank
+    if room_data.question_bank:
+        try:
+            bank = await asyncio.to_thread(load_bank, room_data.question_bank)
+        except QuestionBankError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    room = await game_rooms.create(code, bank)
+    return {'success': True, 'room': room.code, 'url': room.base_path, 'question_bank': bank.name}
+
+# The default room's routes come first so /game/api/... never reads "api" as a room code
+app.include_router(game_router, prefix="/game")
+app.include_router(game_router, prefix="/game/{room_code}")
+
+# ==================== GAME ROOM LIFECYCLE ====================
+_game_rooms_task = None
+
+@app.on_event("startup")
+async def startup_event():
+    """Open the default room and start background tasks"""
+    global _game_rooms_task, _rsvp_writer_task, _rsvp_refresh_task
+    if SPREADSHEET_ID:
+        _rsvp_refresh_task = asyncio.create_task(rsvp_index.run(sheets_pool))
+    _rsvp_writer_task = asyncio.create_task(rsvp_writes.run(sheets_pool))
+    
+    await game_rooms.get(DEFAULT_ROOM)
+    _game_rooms_task = asyncio.create_task(game_rooms.run())
+
 # ==================== YOUR EXISTING CLEANUP AND SERVER START ====================
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup resources on shutdown"""
-    global _sheets_service
-    if _sheets_service:
-        _sheets_service.close()
-        _sheets_service = None
+    global _game_rooms_task, _rsvp_writer_task, _rsvp_refresh_task
+    for task in (_game_rooms_task, _rsvp_refresh_task):
+        if task:
+            task.cancel()
+    _game_rooms_task = None
+    _rsvp_refresh_task = None
+    
+    # Closing a room flushes whatever its event log still has buffered
+    await game_rooms.close_all()
+    
+    if _rsvp_writer_task:
+        # Cancelling writes out whatever RSVP updates are still queued
+        _rsvp_writer_task.cancel()
+        await asyncio.gather(_rsvp_writer_task, return_exceptions=True)
+        _rsvp_writer_task = None
+    
+    sheets_pool.close()
+
+# ==================== METRICS ====================
+# Gauges are read when /metrics is scraped, so they cost nothing per request
+metrics.Gauge('trivia_rooms_open', 'Game rooms open in this worker', lambda: len(game_rooms))
+metrics.Gauge('trivia_teams', 'Teams registered across open rooms', lambda: sum(len(room.state.teams) for room in game_rooms))
+metrics.Gauge('trivia_status_streams', 'Clients connected to a live status stream',
+              lambda: sum(len(room.subscribers) for room in game_rooms))
+metrics.Gauge('rsvp_writes_pending', 'RSVP updates queued for the next batch write', lambda: len(rsvp_writes))
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics for this worker"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+# ==================== AWS LAMBDA ====================
+_lambda_adapter = None
+
+def handler(event, context):
+    """AWS Lambda entry point: API Gateway events are served by the same FastAPI app.
+    
+    Everything at module scope (the RSVP index, the Sheets clients, open game
+    rooms) survives between invocations of a warm container. Without lifespan
+    events, game rooms are opened by their first request, and RSVP updates
+    are written within their own request (RSVP_WRITE_THROUGH).
+    """
+    global _lambda_adapter
+    if _lambda_adapter is None:
+        from mangum import Mangum
+        # Lifespan events would run startup and shutdown around every invocation
+        _lambda_adapter = Mangum(app, lifespan="off")
+    
+    return _lambda_adapter(event, context)
 
 if __name__ == "__main__":
+    import uvicorn
+    
     port = int(os.getenv("PORT", 8000))
     print(f"Starting server on port {port}")
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""Prometheus-style metrics for the app, served at /metrics.
+
+Metrics are plain Python numbers that are only updated from the event loop
+thread (Sheets calls are timed in the coroutine awaiting them, not on the
+pool threads), so recording one is an attribute increment, plus a bisect
+for histograms, with no locks. Gauges are callbacks evaluated when
+/metrics is scraped, so they cost nothing on the request path. Labelled
+metrics hand out their children once; hot paths keep the child they use.
+
+render() produces the Prometheus text exposition format (version 0.0.4).
+"""
+import bisect
+import re
+import time
+from typing import Callable, List, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; the 1 Hz status poll should land in the lowest buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REGISTRY: List['_Metric'] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        REGISTRY.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """The child for these label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _lines(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"] + self._lines()
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """A monotonically increasing count"""
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            # Exported as 0 before the first increment
+            self.labels()
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _lines(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in self._children.items()]
+
+
+class Gauge(_Metric):
+    """A value read from a callback whenever metrics are rendered"""
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.read = read
+
+    def _lines(self) -> List[str]:
+        return [f"{self.name} {_format_value(self.read())}"]
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative `le` buckets"""
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if not self.labelnames:
+            self.labels()
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _lines(self) -> List[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render() -> bytes:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return ('\n'.join(lines) + '\n').encode()
+
+
+# ==================== METRICS ====================
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests by method, route and status', ('method', 'route', 'status'))
+HTTP_DURATION = Histogram('http_request_duration_seconds', 'HTTP request latency by method and route (streams excluded)',
+                          ('method', 'route'))
+
+SHEETS_CALLS = Counter('sheets_api_calls_total', 'Google Sheets API calls by call and HTTP status', ('call', 'status'))
+SHEETS_DURATION = Histogram('sheets_api_call_duration_seconds', 'Google Sheets API call latency, including the wait for a pool thread',
+                            ('call',))
+
+RSVP_WRITES_REJECTED = Counter('rsvp_writes_rejected_total', 'Queued RSVP updates dropped because Sheets rejected them')
+
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by cache and result (hit or miss)', ('cache', 'result'))
+
+TEAMS_REGISTERED = Counter('trivia_teams_registered_total', 'Teams registered')
+ANSWERS_SUBMITTED = Counter('trivia_answers_submitted_total', 'Answers accepted from teams')
+
+
+# id(route) -> its path pattern without the leading ^, to find it at the end of a URL
+# (routes live as long as the app)
+_suffix_patterns = {}
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled a request, e.g. /game/{room_code}/api/game_status"""
+    route = scope.get('route')
+    template = getattr(route, 'path', None)
+    path_regex = getattr(route, 'path_regex', None)
+    if template is None:
+        return 'unmatched'
+    if path_regex is None or path_regex.match(scope['path']):
+        return template
+
+    # Some FastAPI versions leave a route included with a prefix holding only its
+    # own path; put the prefix back, with its path parameters as placeholders
+    suffix = _suffix_patterns.get(id(route))
+    if suffix is None:
+        suffix = _suffix_patterns[id(route)] = re.compile(path_regex.pattern.lstrip('^'))
+    match = suffix.search(scope['path'])
+    if match is None:
+        return template
+    prefix = scope['path'][:match.start()]
+    for name, value in scope.get('path_params', {}).items():
+        if name not in getattr(route, 'param_convertors', {}) and value:
+            prefix = re.sub(f'(?<=/){re.escape(str(value))}(?=/|$)', '{' + name + '}', prefix, count=1)
+    return prefix + template
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them per route template.
+
+    Routes are labelled by their path template (e.g. /game/{room_code}/api/game_status),
+    which keeps the number of series bounded. A request is timed until its
+    last body chunk is sent; event streams run for as long as the client stays,
+    so they are only counted.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        response = {'status': 500, 'stream': False, 'duration': None}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                for key, value in message.get('headers', ()):
+                    if key == b'content-type' and value.startswith(b'text/event-stream'):
+                        response['stream'] = True
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                response['duration'] = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            path = route_template(scope)
+            method = scope['method']
+            HTTP_REQUESTS.labels(method, path, str(response['status'])).inc()
+            if not response['stream']:
+                duration = response['duration']
+                HTTP_DURATION.labels(method, path).observe(time.perf_counter() - started if duration is None else duration)
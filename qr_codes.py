@@ -0,0 +1,72 @@
+"""QR codes for the game join URL.
+
+The join URL only changes with the Host header, so each image is rendered
+once per URL and format and kept as raw bytes. Rendering (qrcode + PIL)
+runs on a worker thread so it never stalls the event loop.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import io
+from collections import OrderedDict
+from typing import Tuple
+
+import metrics
+
+# qrcode (and Pillow for PNG) are optional; without them the page shows the URL only
+AVAILABLE = importlib.util.find_spec('qrcode') is not None
+
+MEDIA_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def render(url: str, fmt: str) -> bytes:
+    """Encode `url` as a QR code image in the given format"""
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(url)
+    qr.make(fit=True)
+
+    buffered = io.BytesIO()
+    if fmt == 'svg':
+        import qrcode.image.svg
+
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffered)
+    else:
+        # Black on white is rendered as a 1-bit image; optimize squeezes its PNG further
+        qr.make_image(fill_color="black", back_color="white").save(buffered, format="PNG", optimize=True)
+    return buffered.getvalue()
+
+
+_CACHE_HIT = metrics.CACHE_REQUESTS.labels('qr_code', 'hit')
+_CACHE_MISS = metrics.CACHE_REQUESTS.labels('qr_code', 'miss')
+
+
+class QRCodeCache:
+    """(url, format) -> (image bytes, strong ETag), least recently used entries evicted first"""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._images: OrderedDict = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    async def get(self, url: str, fmt: str) -> Tuple[bytes, str]:
+        if fmt not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported QR code format: {fmt}")
+
+        key = (url, fmt)
+        (_CACHE_HIT if key in self._images else _CACHE_MISS).inc()
+        if key not in self._images:
+            # One render per image even when several projectors ask at once
+            async with self._lock:
+                if key not in self._images:
+                    image = await asyncio.to_thread(render, url, fmt)
+                    self._images[key] = (image, f'"{hashlib.sha256(image).hexdigest()[:32]}"')
+                    while len(self._images) > self.max_entries:
+                        self._images.popitem(last=False)
+
+        self._images.move_to_end(key)
+        return self._images[key]
@@ -0,0 +1,198 @@
+"""Question banks for the trivia game.
+
+A bank is a JSON or YAML file, or a directory of them read in name order.
+Each file holds one or more rounds:
+
+    {"rounds": [{"name": "Culture Club", "questions": [...]}, ...]}
+
+A file with a single round can use {"name": ..., "questions": [...]}, or be
+just the list of questions. Every question needs `question`, `category`,
+`options` (at least two strings) and `correct` (an index into options).
+`scoring` optionally picks a scoring strategy for it. `points` is required
+unless `scoring` is double_or_nothing, which doubles or resets the team's
+score and so takes no points. A question without a category takes the
+round name.
+
+Banks are validated once when loaded and compiled into an immutable
+QuestionBank that also carries each question pre-serialized, so swapping
+banks is a single reference assignment.
+"""
+import json
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, List, Optional, Tuple
+
+import orjson
+
+EXTENSIONS = ('.json', '.yaml', '.yml')
+
+REQUIRED_FIELDS = ('question', 'category', 'options', 'correct')
+OPTIONAL_FIELDS = ('points', 'scoring')
+
+# Strategies that do not award a question's points
+STRATEGIES_WITHOUT_POINTS = ('double_or_nothing',)
+
+
+class QuestionBankError(ValueError):
+    """A question bank that cannot be found, parsed or validated"""
+
+
+@dataclass(frozen=True)
+class QuestionBank:
+    """Validated, read-only questions plus their (hidden, revealed) JSON payloads"""
+    name: str
+    questions: Tuple[MappingProxyType, ...]
+    payloads: Tuple[Tuple[bytes, bytes], ...]
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __getitem__(self, index: int) -> MappingProxyType:
+        return self.questions[index]
+
+    def __iter__(self):
+        return iter(self.questions)
+
+
+def _parse(path: str):
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        try:
+            import yaml
+        except ImportError:
+            raise QuestionBankError(f"{path}: PyYAML is needed to read YAML question banks")
+        try:
+            return yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise QuestionBankError(f"{path}: {e}")
+
+
+def _rounds(path: str, content) -> List[Tuple[Optional[str], list]]:
+    if isinstance(content, list):
+        return [(None, content)]
+    if isinstance(content, dict) and 'rounds' in content:
+        rounds = content['rounds']
+    elif isinstance(content, dict) and 'questions' in content:
+        rounds = [content]
+    else:
+        raise QuestionBankError(f"{path}: expected a list of questions, or 'rounds' or 'questions'")
+
+    if not isinstance(rounds, list) or not all(isinstance(r, dict) and isinstance(r.get('questions'), list) for r in rounds):
+        raise QuestionBankError(f"{path}: every round needs a list of questions")
+    return [(r.get('name'), r['questions']) for r in rounds]
+
+
+def _validate(where: str, question, round_name: Optional[str], strategies: Iterable[str]) -> dict:
+    if not isinstance(question, dict):
+        raise QuestionBankError(f"{where}: expected an object")
+
+    question = dict(question)
+    if round_name and 'category' not in question:
+        question['category'] = round_name
+
+    missing = [field for field in REQUIRED_FIELDS if field not in question]
+    if missing:
+        raise QuestionBankError(f"{where}: missing {', '.join(missing)}")
+    unknown = set(question) - set(REQUIRED_FIELDS) - set(OPTIONAL_FIELDS)
+    if unknown:
+        raise QuestionBankError(f"{where}: unknown fields {', '.join(sorted(unknown))}")
+
+    for field in ('question', 'category'):
+        if not isinstance(question[field], str) or not question[field].strip():
+            raise QuestionBankError(f"{where}: {field} must be a non-empty string")
+
+    options = question['options']
+    if (not isinstance(options, list) or len(options) < 2
+            or not all(isinstance(option, str) and option.strip() for option in options)):
+        raise QuestionBankError(f"{where}: options must be a list of at least two non-empty strings")
+
+    correct = question['correct']
+    if isinstance(correct, bool) or not isinstance(correct, int) or not 0 <= correct < len(options):
+        raise QuestionBankError(f"{where}: correct must be an index into options (0-{len(options) - 1})")
+
+    if 'scoring' in question and question['scoring'] not in strategies:
+        raise QuestionBankError(f"{where}: unknown scoring strategy {question['scoring']!r}")
+
+    if question.get('scoring') in STRATEGIES_WITHOUT_POINTS:
+        # Shown to players otherwise, as if it were what they could win
+        if 'points' in question:
+            raise QuestionBankError(f"{where}: {question['scoring']} questions have no points")
+    else:
+        points = question.get('points')
+        if isinstance(points, bool) or not isinstance(points, int) or points <= 0:
+            raise QuestionBankError(f"{where}: points must be a positive integer")
+
+    return question
+
+
+def compile_bank(name: str, rounds: List[Tuple[str, Optional[str], list]], strategies: Iterable[str] = ()) -> QuestionBank:
+    """Validate (source, round name, questions) rounds into a QuestionBank"""
+    strategies = tuple(strategies)
+    questions = []
+    for source, round_name, round_questions in rounds:
+        for question in round_questions:
+            questions.append(_validate(f"{source} question {len(questions) + 1}", question, round_name, strategies))
+
+    if not questions:
+        raise QuestionBankError(f"Question bank {name!r} has no questions")
+
+    payloads = []
+    for question in questions:
+        hidden = {key: value for key, value in question.items() if key != 'correct'}
+        payloads.append((orjson.dumps(hidden), orjson.dumps(question)))
+
+    return QuestionBank(
+        name=name,
+        questions=tuple(MappingProxyType(question) for question in questions),
+        payloads=tuple(payloads)
+    )
+
+
+def bank_path(directory: str, name: str) -> str:
+    """The file or directory holding bank `name` inside `directory`"""
+    if not name or name.startswith('.') or os.sep in name or (os.altsep and os.altsep in name):
+        raise QuestionBankError(f"Invalid question bank name: {name!r}")
+
+    for candidate in [os.path.join(directory, name + ext) for ext in EXTENSIONS] + [os.path.join(directory, name)]:
+        if os.path.exists(candidate):
+            return candidate
+    raise QuestionBankError(f"No question bank named {name!r} in {directory}")
+
+
+def list_banks(directory: str) -> List[str]:
+    """Names of the banks available in `directory`"""
+    names = set()
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        root, ext = os.path.splitext(entry)
+        if entry.startswith('.'):
+            continue
+        if os.path.isdir(path):
+            names.add(entry)
+        elif ext in EXTENSIONS:
+            names.add(root)
+    return sorted(names)
+
+
+def load_question_bank(directory: str, name: str, strategies: Iterable[str] = ()) -> QuestionBank:
+    """Read, validate and compile bank `name` from `directory`"""
+    path = bank_path(directory, name)
+    if os.path.isdir(path):
+        files = [os.path.join(path, entry) for entry in sorted(os.listdir(path)) if entry.endswith(EXTENSIONS)]
+    else:
+        files = [path]
+
+    rounds = []
+    for file_path in files:
+        try:
+            content = _parse(file_path)
+        except QuestionBankError:
+            raise
+        except (OSError, ValueError) as e:
+            raise QuestionBankError(f"{file_path}: {e}")
+        source = os.path.relpath(file_path, directory)
+        rounds.extend((source, round_name, questions) for round_name, questions in _rounds(source, content))
+
+    return compile_bank(name, rounds, strategies)
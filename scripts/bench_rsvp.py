@@ -0,0 +1,238 @@
+"""Microbenchmarks and regression gate for the RSVP lookup path.
+
+Runs the lookup path against the in-process fake Sheets API (fake_sheets.py),
+through the real googleapiclient client, with synthetic guest lists of 100, 1k, 10k and 100k rows and measures, per size:
+
+    index_build   - RsvpIndex.refresh(): one read of the access code column
+    lookup        - a warm RsvpIndex.lookup() (index and record cached)
+    handler_cold  - main.handler GET /user/{code} right after the index was dropped
+    handler_warm  - main.handler GET /user/{code} with everything cached
+
+plus is_valid_code() once. Alongside the timings it records the peak
+traced memory and the number of memory blocks still allocated per warm
+lookup (tracemalloc / sys.getallocatedblocks), and the memory the index
+holds.
+
+The report is written as JSON, and the run fails (exit status 1) when a
+threshold is exceeded. In particular a warm lookup or warm handler call
+may not get much slower as the guest list grows, which catches changes
+that make the per-lookup cost depend on the sheet size.
+
+Access codes (NANGIE + 3 letters or digits) allow 46,656 guests, so rows
+past that hold codes in another format, like rows without a valid code.
+
+Usage:
+    python scripts/bench_rsvp.py [--sizes 100,1000,10000,100000] [--output report.json] [--no-gate]
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# main builds its RSVP index around SPREADSHEET_ID at import time
+os.environ.setdefault('SPREADSHEET_ID', 'rsvp-benchmark')
+
+# Limits a run must stay within; growth is the ratio between the largest and smallest size
+THRESHOLDS = {
+    'is_valid_code_ns': 2000,
+    'index_build_us_per_row': 10,
+    'lookup_us': 50,
+    'lookup_growth': 2.0,
+    'lookup_blocks_per_call': 0.5,
+    'handler_warm_growth': 2.0,
+}
+
+LOOKUPS = 2000
+HANDLER_CALLS = 200
+
+
+def sample_codes(grid: list, count: int) -> list:
+    """Valid codes spread evenly over the sheet"""
+    codes = [row[0] for row in grid[1:] if row[0].startswith('NANGIE')]
+    step = max(1, len(codes) // count)
+    return codes[::step][:count]
+
+
+def measure_memory(fn, calls: int) -> dict:
+    """Peak traced memory of `calls` calls, and memory blocks still allocated per call"""
+    gc.collect()
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    for _ in range(calls):
+        fn()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'peak_kib': peak / 1024, 'blocks_per_call': max(retained, 0) / calls}
+
+
+def fake_service(grid: list):
+    from googleapiclient.discovery import build
+
+    from fake_sheets import FakeSheets, FakeSheetsHttp
+
+    http = FakeSheetsHttp(FakeSheets({'Sheet1': grid}))
+    return build('sheets', 'v4', http=http, cache_discovery=False, static_discovery=True)
+
+
+def bench_index(grid: list, headers: list) -> dict:
+    from sheets import RsvpIndex
+
+    service = fake_service(grid)
+    range_name = f"Sheet1!A:{chr(ord('A') + len(headers) - 1)}"
+
+    index = RsvpIndex('rsvp-benchmark', range_name, headers[0], headers=headers)
+    # The first call also sets up the client's API methods, which is not part of the build
+    index.refresh(service)
+    build = min(timeit.repeat(lambda: index.refresh(service), number=1, repeat=3))
+
+    # Traced separately, tracemalloc slows every allocation down
+    tracemalloc.start()
+    traced = RsvpIndex('rsvp-benchmark', range_name, headers[0], headers=headers)
+    traced.refresh(service)
+    index_kib = tracemalloc.get_traced_memory()[0] / 1024
+    del traced
+    tracemalloc.stop()
+
+    codes = sample_codes(grid, 100)
+    index.lookup_many(service, codes)
+    cycle = itertools.cycle(codes)
+    lookup = lambda: index.lookup(service, next(cycle))
+
+    timings = timeit.repeat(lookup, number=LOOKUPS, repeat=5)
+    memory = measure_memory(lookup, LOOKUPS)
+    return {
+        'index_build_ms': build * 1000,
+        'index_build_us_per_row': build / (len(grid) - 1) * 1e6,
+        'index_kib': index_kib,
+        'lookup_us': min(timings) / LOOKUPS * 1e6,
+        'lookup_peak_kib': memory['peak_kib'],
+        'lookup_blocks_per_call': memory['blocks_per_call'],
+    }
+
+
+def handler_event(code: str) -> dict:
+    """API Gateway REST API proxy event for GET /user/{code}"""
+    path = f"/user/{code}"
+    return {
+        'resource': '/{proxy+}', 'path': path, 'httpMethod': 'GET',
+        'headers': {'Host': 'localhost'}, 'multiValueHeaders': {'Host': ['localhost']},
+        'queryStringParameters': None, 'multiValueQueryStringParameters': None,
+        'pathParameters': {'proxy': path.lstrip('/')}, 'stageVariables': None,
+        'requestContext': {'resourcePath': '/{proxy+}', 'httpMethod': 'GET', 'path': path,
+                           'stage': 'prod', 'identity': {'sourceIp': '127.0.0.1'}},
+        'body': None, 'isBase64Encoded': False,
+    }
+
+
+def bench_handler(main, grid: list) -> dict:
+    from sheets import SheetsPool
+
+    main.sheets_pool.close()
+    main.sheets_pool = SheetsPool(max_workers=4, service_factory=lambda scopes: fake_service(grid))
+
+    code = sample_codes(grid, 1)[0]
+    event = handler_event(code)
+
+    # Cold: the index is rebuilt and the guest's row read before answering
+    main.rsvp_index.invalidate()
+    main.rsvp_index._records = {}
+    started = time.perf_counter()
+    response = main.handler(event, None)
+    cold = time.perf_counter() - started
+    if response['statusCode'] != 200:
+        raise RuntimeError(f"GET /user/{code} returned {response['statusCode']}: {response['body']}")
+
+    warm = []
+    for _ in range(HANDLER_CALLS):
+        started = time.perf_counter()
+        main.handler(event, None)
+        warm.append(time.perf_counter() - started)
+
+    return {
+        'handler_cold_ms': cold * 1000,
+        'handler_warm_ms': statistics.median(warm) * 1000,
+        'handler_warm_p99_ms': sorted(warm)[int(len(warm) * 0.99)] * 1000,
+    }
+
+
+def check(report: dict, thresholds: dict) -> list:
+    """Threshold violations as readable strings"""
+    sizes = report['sizes']
+    smallest, largest = sizes[min(sizes, key=int)], sizes[max(sizes, key=int)]
+    values = {
+        'is_valid_code_ns': report['is_valid_code_ns'],
+        # At small sizes the fixed cost of the API call dominates
+        'index_build_us_per_row': largest['index_build_us_per_row'],
+        'lookup_us': max(size['lookup_us'] for size in sizes.values()),
+        'lookup_growth': largest['lookup_us'] / smallest['lookup_us'],
+        'lookup_blocks_per_call': max(size['lookup_blocks_per_call'] for size in sizes.values()),
+        'handler_warm_growth': largest['handler_warm_ms'] / smallest['handler_warm_ms'],
+    }
+    report['gate'] = {name: {'value': values[name], 'limit': limit} for name, limit in thresholds.items()}
+    return [f"{name} = {values[name]:.3g} exceeds {limit}" for name, limit in thresholds.items()
+            if values[name] > limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,1000,10000,100000')
+    parser.add_argument('--output', help='report path (default: bench_results/rsvp_bench_<time>.json)')
+    parser.add_argument('--no-gate', action='store_true', help='report without failing on thresholds')
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    import main as app_main
+    from fake_sheets import synthetic_guests
+    from sheets import is_valid_code
+
+    started_at = datetime.now()
+    report = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'is_valid_code_ns': min(timeit.repeat(lambda: (is_valid_code('NANGIEA1B'), is_valid_code('bad code')),
+                                              number=100000, repeat=5)) / 200000 * 1e9,
+        'sizes': {},
+    }
+
+    print(f"is_valid_code: {report['is_valid_code_ns']:.0f} ns")
+    print(f"{'rows':>8}{'build':>11}{'index':>11}{'lookup':>10}{'blocks':>8}{'cold':>11}{'warm':>10}")
+    for size in [int(size) for size in args.sizes.split(',')]:
+        grid = synthetic_guests(size, app_main.HEADERS)
+        result = {**bench_index(grid, app_main.HEADERS), **bench_handler(app_main, grid)}
+        report['sizes'][str(size)] = result
+        print(f"{size:>8}{result['index_build_ms']:>9.1f}ms{result['index_kib']:>8.0f}KiB"
+              f"{result['lookup_us']:>8.2f}us{result['lookup_blocks_per_call']:>8.2f}"
+              f"{result['handler_cold_ms']:>9.1f}ms{result['handler_warm_ms']:>8.2f}ms")
+
+    failures = check(report, THRESHOLDS)
+    report['passed'] = not failures
+
+    path = args.output or os.path.join(REPO_ROOT, 'bench_results', f"rsvp_bench_{started_at:%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved report to {path}")
+
+    app_main.sheets_pool.close()
+    if failures:
+        print("Thresholds exceeded:\n  " + "\n  ".join(failures))
+        if not args.no_gate:
+            sys.exit(1)
+    else:
+        print("All thresholds met")
+
+
+if __name__ == '__main__':
+    main()
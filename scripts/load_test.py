@@ -0,0 +1,312 @@
+"""Load test the trivia game API with simulated teams.
+
+Every simulated team registers, polls game_status once a second like a
+phone does, and submits its answer in a burst shortly before the question
+is revealed. An admin task drives the game: start_question, wait, then
+show_answer and next_question for every question.
+
+The game runs in a fresh room (see "Trivia Game Rooms" in the README), so a
+load test never touches the game in the default room.
+
+Targets:
+    (default)            main.app in this process through an ASGI transport
+    --serve              a uvicorn server started for the run (--workers N, which
+                         share a SQLite store in a temporary directory when N > 1)
+    --url URL            a server that is already running
+
+Reports p50/p99/max latency, throughput and errors per endpoint, and saves
+them as JSON in --output so runs can be compared with --compare.
+
+Usage:
+    python scripts/load_test.py [--teams 100] [--questions 3] [--question-seconds 8]
+                                [--serve [--workers 1] | --url http://localhost:8000]
+                                [--output bench_results] [--compare bench_results/<run>.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Recorder:
+    """Latencies and errors per endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.errors[name] += 1
+            self.statuses[name][type(e).__name__] += 1
+            return None
+
+        self.latencies[name].append(time.perf_counter() - started)
+        self.statuses[name][response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[name])
+            # Requests that raised have no latency but count towards the error rate
+            count = len(values) + sum(n for status, n in self.statuses[name].items() if not isinstance(status, int))
+            endpoints[name] = {
+                'requests': len(values),
+                'errors': self.errors[name],
+                'error_rate': self.errors[name] / max(count, 1),
+                'rps': len(values) / elapsed,
+                'p50_ms': percentile(values, 0.50) * 1000,
+                'p99_ms': percentile(values, 0.99) * 1000,
+                'max_ms': (values[-1] if values else 0) * 1000,
+                'statuses': {str(status): n for status, n in self.statuses[name].items()},
+            }
+
+        requests = sum(endpoint['requests'] for endpoint in endpoints.values())
+        errors = sum(endpoint['errors'] for endpoint in endpoints.values())
+        return {
+            'elapsed_s': elapsed,
+            'requests': requests,
+            'errors': errors,
+            'rps': requests / elapsed,
+            'endpoints': endpoints,
+        }
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class Round:
+    """What the admin has announced about the current question"""
+
+    def __init__(self):
+        self.question = -1
+        self.reveal_at = 0.0
+        self.over = False
+
+
+async def team(client, recorder: Recorder, base: str, index: int, round_: Round, burst_window: float):
+    name = f"load-team-{index}"
+    await recorder.request(client, 'register_team', 'POST', f"{base}/api/register_team", json={'team_name': name})
+
+    # Phones open the page at different times, so polls are spread across the second
+    await asyncio.sleep(random.random())
+    answered = -1
+    submit_task = None
+
+    while not round_.over:
+        response = await recorder.request(client, 'game_status', 'GET', f"{base}/api/game_status")
+        if response is not None and response.status_code == 200:
+            status = response.json()
+            question = status['current_question']
+            if (status['question'] and not status['answers_locked']
+                    and question == round_.question and question > answered):
+                answered = question
+                # Most teams answer in the last few seconds before the reveal
+                delay = max(0.0, round_.reveal_at - time.monotonic() - random.uniform(0.1, burst_window))
+                submit_task = asyncio.create_task(submit(client, recorder, base, name, delay, len(status['question']['options'])))
+        await asyncio.sleep(1)
+
+    if submit_task:
+        await submit_task
+
+
+async def submit(client, recorder: Recorder, base: str, team_name: str, delay: float, options: int):
+    await asyncio.sleep(delay)
+    await recorder.request(client, 'submit_answer', 'POST', f"{base}/api/submit_answer",
+                           json={'team_name': team_name, 'answer': random.randrange(options)})
+
+
+async def admin(client, recorder: Recorder, base: str, round_: Round, questions: int, question_seconds: float):
+    # Give every team time to register and start polling
+    await asyncio.sleep(2)
+
+    for question in range(questions):
+        round_.reveal_at = time.monotonic() + question_seconds
+        round_.question = question
+        response = await recorder.request(client, 'start_question', 'POST', f"{base}/api/start_question")
+        if response is None or response.status_code != 200:
+            break
+
+        await asyncio.sleep(max(0.0, round_.reveal_at - time.monotonic()))
+        await recorder.request(client, 'show_answer', 'POST', f"{base}/api/show_answer")
+        await asyncio.sleep(2)
+        await recorder.request(client, 'next_question', 'POST', f"{base}/api/next_question")
+
+    await recorder.request(client, 'scores', 'GET', f"{base}/api/scores")
+    round_.over = True
+
+
+async def run_game(client: httpx.AsyncClient, args) -> dict:
+    room = args.room or f"load-{datetime.now():%H%M%S}-{random.randrange(1000):03d}"
+    response = await client.post("/game/api/rooms", json={'room': room})
+    if response.status_code != 200:
+        raise SystemExit(f"Could not create room {room}: {response.status_code} {response.text}")
+    base = response.json()['url']
+
+    recorder = Recorder()
+    round_ = Round()
+    started = time.perf_counter()
+    await asyncio.gather(
+        admin(client, recorder, base, round_, args.questions, args.question_seconds),
+        *(team(client, recorder, base, index, round_, args.burst_window) for index in range(args.teams))
+    )
+    report = recorder.report(time.perf_counter() - started)
+    report['room'] = room
+    return report
+
+
+async def run_in_process(args) -> dict:
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)
+    import main
+
+    await main.startup_event()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            return await run_game(client, args)
+    finally:
+        await main.shutdown_event()
+
+
+async def run_against(url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.teams + 1, max_keepalive_connections=args.teams + 1)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        return await run_game(client, args)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, data_dir: str) -> tuple:
+    env = dict(os.environ)
+    if workers > 1:
+        # Workers only share a game through a SQLite store; each would have its own in memory
+        env['GAME_STATE_STORE'] = f"sqlite:///{os.path.join(data_dir, 'game.db')}"
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+        cwd=REPO_ROOT, env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit("uvicorn exited before it was ready")
+        try:
+            if httpx.get(f"{url}/game/api/game_status", timeout=1).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("uvicorn did not start within 30 seconds")
+
+
+def print_report(report: dict, baseline: dict = None):
+    print(f"\n{report['requests']} requests in {report['elapsed_s']:.1f}s "
+          f"({report['rps']:.1f}/s), {report['errors']} errors")
+    print(f"{'endpoint':16}{'requests':>10}{'rps':>9}{'p50':>10}{'p99':>10}{'max':>10}{'errors':>8}")
+    for name, endpoint in report['endpoints'].items():
+        print(f"{name:16}{endpoint['requests']:>10}{endpoint['rps']:>9.1f}"
+              f"{endpoint['p50_ms']:>8.1f}ms{endpoint['p99_ms']:>8.1f}ms{endpoint['max_ms']:>8.1f}ms"
+              f"{endpoint['errors']:>8}")
+
+    if baseline:
+        print(f"\nCompared with {baseline['started_at']} ({baseline['target']}):")
+        for name, endpoint in report['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+            if not before:
+                continue
+            print(f"{name:16}p50 {delta(endpoint['p50_ms'], before['p50_ms']):>8}"
+                  f"   p99 {delta(endpoint['p99_ms'], before['p99_ms']):>8}"
+                  f"   errors {endpoint['errors'] - before['errors']:+d}")
+
+
+def delta(now: float, before: float) -> str:
+    if not before:
+        return 'n/a'
+    return f"{(now - before) / before * 100:+.0f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--teams', type=int, default=100)
+    parser.add_argument('--questions', type=int, default=3)
+    parser.add_argument('--question-seconds', type=float, default=8, help='time from start_question to show_answer')
+    parser.add_argument('--burst-window', type=float, default=2, help='teams submit within this many seconds of the reveal')
+    parser.add_argument('--room', help='room code to create for the run (default: a new load-* room)')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--serve', action='store_true', help='start a uvicorn server for the run')
+    target.add_argument('--url', help='base URL of a running server')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn workers with --serve')
+    parser.add_argument('--output', default=os.path.join(REPO_ROOT, 'bench_results'), help='directory for the JSON results')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    args = parser.parse_args()
+
+    started_at = datetime.now()
+    if args.url:
+        target_name = args.url
+        report = asyncio.run(run_against(args.url, args))
+    elif args.serve:
+        target_name = f"uvicorn --workers {args.workers}"
+        with tempfile.TemporaryDirectory() as data_dir:
+            server, url = start_server(args.workers, data_dir)
+            try:
+                report = asyncio.run(run_against(url, args))
+            finally:
+                server.terminate()
+                server.wait()
+    else:
+        target_name = "in-process ASGI"
+        report = asyncio.run(run_in_process(args))
+
+    report = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'target': target_name,
+        'config': {key: getattr(args, key) for key in ('teams', 'questions', 'question_seconds', 'burst_window', 'workers')},
+        **report,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"load_test_{started_at:%Y%m%d_%H%M%S}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {path}")
+
+
+if __name__ == '__main__':
+    main()
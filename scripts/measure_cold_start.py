@@ -0,0 +1,105 @@
+"""Measure Lambda cold starts of the Lambda handler (main.handler) locally.
+
+Every run starts a fresh interpreter, like a new Lambda execution
+environment, and reports:
+
+    init    - importing main (the Lambda INIT phase)
+    invoke  - the first handler call, GET /user/{code} (cold invoke)
+    warm    - a second call in the same process
+
+Usage:
+    python scripts/measure_cold_start.py [--runs 10] [--code NANGIE123] [--importtime]
+
+An invalid code measures the path that never touches Google Sheets. A valid
+code needs SPREADSHEET_ID and GOOGLE_SHEETS_CREDENTIALS in the environment;
+without them the run reports the error status it got.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+import main
+init = time.perf_counter() - started
+
+# API Gateway REST API proxy event, as the SAM template delivers it
+path = "/user/" + sys.argv[1]
+event = {
+    "resource": "/{proxy+}", "path": path, "httpMethod": "GET",
+    "headers": {"Host": "localhost"}, "multiValueHeaders": {"Host": ["localhost"]},
+    "queryStringParameters": None, "multiValueQueryStringParameters": None,
+    "pathParameters": {"proxy": path.lstrip("/")}, "stageVariables": None,
+    "requestContext": {"resourcePath": "/{proxy+}", "httpMethod": "GET", "path": path,
+                       "stage": "prod", "identity": {"sourceIp": "127.0.0.1"}},
+    "body": None, "isBase64Encoded": False,
+}
+timings = []
+for _ in range(2):
+    started = time.perf_counter()
+    response = main.handler(event, None)
+    timings.append(time.perf_counter() - started)
+
+print(json.dumps({"init": init, "invoke": timings[0], "warm": timings[1],
+                  "status": response["statusCode"]}))
+'''
+
+
+def child_env() -> dict:
+    # The RSVP index is built around SPREADSHEET_ID at import time
+    return {'SPREADSHEET_ID': 'cold-start-measurement', **os.environ}
+
+
+def measure(code: str) -> dict:
+    result = subprocess.run([sys.executable, '-c', CHILD, code], cwd=REPO_ROOT, env=child_env(),
+                            capture_output=True, text=True, check=True)
+    # The handler logs to stdout; the measurement is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_import_times(limit: int = 15):
+    """The modules that take longest to import, cumulative microseconds"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=REPO_ROOT, env=child_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), name.rstrip()))
+    print("\nSlowest imports of main (cumulative):")
+    for cumulative_us, name in sorted(rows, reverse=True)[:limit]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--code', default='NANGIE123')
+    parser.add_argument('--importtime', action='store_true', help='also list the slowest imports')
+    args = parser.parse_args()
+
+    # One throwaway run so .pyc files exist, as they do in a deployed package
+    measure(args.code)
+    runs = [measure(args.code) for _ in range(args.runs)]
+
+    statuses = sorted({run['status'] for run in runs})
+    print(f"{args.runs} cold starts with code {args.code!r} (status {', '.join(map(str, statuses))})")
+    print(f"{'':8}{'median':>10}{'p90':>10}{'max':>10}")
+    for phase in ('init', 'invoke', 'warm'):
+        values = sorted(run[phase] * 1000 for run in runs)
+        p90 = values[min(len(values) - 1, int(len(values) * 0.9))]
+        print(f"{phase:8}{statistics.median(values):>8.1f}ms{p90:>8.1f}ms{values[-1]:>8.1f}ms")
+
+    if args.importtime:
+        print_import_times()
+
+
+if __name__ == '__main__':
+    main()
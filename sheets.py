@@ -0,0 +1,630 @@
+"""Google Sheets RSVP access shared by the FastAPI app (main.py) and the Lambda handler.
+
+Building a Sheets client is the expensive part of a lookup: parsing the
+service account, loading the API discovery document and opening a TLS
+connection. build_sheets_service() does all of that once. The discovery
+document comes from the copy bundled with google-api-python-client, so no
+discovery request is made at cold start. The Google client libraries take
+a large share of a Lambda cold start to import, so they are imported only
+when a client is actually built. The Lambda handler keeps the
+returned client in a module-level global and reuses it, with its keep-alive
+HTTP connection, across warm invocations. The FastAPI app goes through a
+SheetsPool, which keeps one client per worker thread so the blocking API
+calls stay off the event loop.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+READONLY_SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+
+# Seconds before a Sheets API call is abandoned
+HTTP_TIMEOUT = 10
+
+# Sheets API statuses worth retrying: quota exceeded and transient server errors
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+# Longest value Sheets accepts in a cell
+CELL_CHARACTER_LIMIT = 50000
+
+# Access codes: NANGIE followed by three letters or digits
+CODE_PATTERN = re.compile(r'NANGIE[A-Z0-9]{3}')
+
+# Parsed service account credentials per scope set, kept for the life of the process
+_credentials = {}
+_credentials_lock = threading.Lock()
+
+
+def _credentials_json() -> str:
+    creds_json = os.environ.get('GOOGLE_SHEETS_CREDENTIALS') or os.environ.get('GOOGLE_CREDENTIALS')
+    if creds_json:
+        return creds_json
+
+    secret_name = os.environ.get('GOOGLE_SHEETS_SECRET_NAME')
+    if not secret_name:
+        raise KeyError('GOOGLE_SHEETS_CREDENTIALS')
+    import boto3
+
+    return boto3.client('secretsmanager').get_secret_value(SecretId=secret_name)['SecretString']
+
+
+def load_credentials(scopes: list):
+    """Service account credentials, parsed once per scope set.
+
+    Docker and buildpack deployments set GOOGLE_SHEETS_CREDENTIALS and older
+    Lambda functions GOOGLE_CREDENTIALS; both hold the service account JSON.
+    The SAM template instead sets GOOGLE_SHEETS_SECRET_NAME, the AWS Secrets
+    Manager secret holding it.
+    """
+    key = tuple(scopes)
+    with _credentials_lock:
+        if key not in _credentials:
+            from google.oauth2 import service_account
+
+            creds_json = _credentials_json()
+            _credentials[key] = service_account.Credentials.from_service_account_info(
+                json.loads(creds_json), scopes=scopes)
+        return _credentials[key]
+
+
+def build_sheets_service(scopes: list = SCOPES, credentials=None):
+    """Build a Sheets v4 client from the bundled discovery document.
+
+    With FAKE_SHEETS set the client talks to the local fake in fake_sheets.py
+    instead, and needs no credentials.
+    """
+    fake = os.environ.get('FAKE_SHEETS')
+    if fake:
+        import fake_sheets
+
+        return fake_sheets.build_service(fake)
+
+    import google_auth_httplib2
+    import httplib2
+    from googleapiclient.discovery import build
+
+    if credentials is None:
+        credentials = load_credentials(scopes)
+
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+    return build('sheets', 'v4', http=http, cache_discovery=False, static_discovery=True)
+
+
+def values_api(service):
+    """service.spreadsheets().values(), built once per client.
+
+    googleapiclient builds a resource from the discovery document on every
+    spreadsheets() call, which takes tens of milliseconds.
+    """
+    values = getattr(service, '_values_api', None)
+    if values is None:
+        values = service._values_api = service.spreadsheets().values()
+    return values
+
+
+class SheetsPool:
+    """Runs blocking Sheets API calls off the event loop.
+
+    googleapiclient is synchronous and its httplib2 transport is not thread
+    safe, so calls go to a small thread pool where each thread lazily builds
+    and keeps its own client (sharing one set of credentials). A semaphore
+    caps the calls in flight at `max_workers`; extra callers wait as cheap
+    coroutines, and the event loop keeps serving game requests meanwhile.
+    `service_factory(scopes)` builds each thread's client, build_sheets_service
+    unless another one (such as a fake for benchmarks) is given.
+    """
+
+    def __init__(self, scopes: list = SCOPES, max_workers: int = 4, service_factory: Callable = None):
+        self.scopes = scopes
+        self.max_workers = max_workers
+        self.service_factory = service_factory or build_sheets_service
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='sheets')
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._services = []
+
+    def _service(self):
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self.service_factory(self.scopes)
+            with self._lock:
+                self._services.append(service)
+            self._local.service = service
+        return service
+
+    def _call(self, fn: Callable, args: tuple):
+        return fn(self._service(), *args)
+
+    async def run(self, fn: Callable, *args):
+        """Call fn(service, *args) on a pool thread and return its result"""
+        call = getattr(fn, '__name__', 'call').lstrip('_')
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            async with self._semaphore:
+                result = await asyncio.get_running_loop().run_in_executor(self._executor, self._call, fn, args)
+            status = '200'
+            return result
+        except Exception as e:
+            # HttpError carries the API's status; anything else (timeouts, credentials) stays "error"
+            status = str(getattr(getattr(e, 'resp', None), 'status', status))
+            raise
+        finally:
+            # Recorded here on the event loop thread, never on the pool threads
+            metrics.SHEETS_CALLS.labels(call, status).inc()
+            metrics.SHEETS_DURATION.labels(call).observe(time.perf_counter() - started)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for service in self._services:
+            service.close()
+        self._services = []
+
+
+def column_letter(index: int) -> str:
+    """A1 column letter for a 0-based column index"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def column_index(letters: str) -> int:
+    """0-based column index for an A1 column letter"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def is_valid_code(code):
+    """Validate the code format.
+    """
+    if not code:
+        return False
+    
+    return CODE_PATTERN.fullmatch(code)
+
+
+# Async lookups answered from memory (hit) or after waiting on a Sheets read (miss)
+_CACHE_HIT = metrics.CACHE_REQUESTS.labels('rsvp_index', 'hit')
+_CACHE_MISS = metrics.CACHE_REQUESTS.labels('rsvp_index', 'miss')
+
+
+class RsvpIndex:
+    """Access code -> sheet row index over the RSVP sheet.
+
+    Building the index reads only the access code column, so its cost does
+    not grow with the bulky free-text columns. A guest's full record is read
+    on demand from just their row (with values.batchGet when several guests
+    are looked up at once) and cached until the index is next rebuilt.
+    Lookups are a dict hit with no Sheets round trip until the index is
+    older than `ttl` seconds or is invalidated. Row numbers are 1-based sheet
+    rows, ready to be used in A1 ranges for updates.
+
+    `range_name` (e.g. 'RSVP!A:G') names the sheet and the columns of a
+    record. `headers` are the field names of those columns; when they are
+    not given they are read from the first row once.
+
+    The async methods add stale-while-revalidate on top: a stale index keeps
+    answering for up to `stale_ttl` more seconds while one background read
+    replaces it, and every caller that has to wait shares that same read.
+    An unknown code re-reads the sheet (to pick up newly added guests) only
+    if the index is older than `negative_ttl`, so a burst of mistyped or
+    guessed codes costs at most one call per `negative_ttl` seconds.
+    """
+
+    def __init__(self, spreadsheet_id: str, range_name: str, code_column: str, headers: list = None,
+                 ttl: float = 300, stale_ttl: float = 3600, negative_ttl: float = 30):
+        self.spreadsheet_id = spreadsheet_id
+        self.range_name = range_name
+        self.code_column = code_column
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+
+        self.sheet_name, columns = range_name.rsplit('!', 1)
+        self.first_column, self.last_column = columns.split(':')
+        self.headers = list(headers) if headers else []
+
+        self._rows: Dict[str, int] = {}
+        self._records: Dict[str, dict] = {}
+        self._loaded_at = None
+        self._refreshing: Optional[asyncio.Task] = None
+        # (time, code, fields) written recently, for row reads that were in flight meanwhile
+        self._recent_updates: List[Tuple[float, str, Dict[str, str]]] = []
+
+    @property
+    def age(self) -> float:
+        """Seconds since the sheet was last read, infinite if it never was"""
+        return float('inf') if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    @property
+    def stale(self) -> bool:
+        return self.age > self.ttl
+
+    @property
+    def expired(self) -> bool:
+        """Too old to serve even while revalidating"""
+        return self.age > self.ttl + self.stale_ttl
+
+    def invalidate(self):
+        """Force the next lookup to re-read the sheet"""
+        self._loaded_at = None
+
+    def _row_range(self, row: int) -> str:
+        return f"{self.sheet_name}!{self.first_column}{row}:{self.last_column}{row}"
+
+    def _fetch(self, service) -> list:
+        """Read the access code column, plus the header row if it is not known yet"""
+        values = values_api(service)
+        if not self.headers:
+            result = values.get(spreadsheetId=self.spreadsheet_id, range=self._row_range(1)).execute()
+            rows = result.get('values', [])
+            self.headers = rows[0] if rows else []
+        if not self.headers:
+            return []
+
+        code_column = column_letter(column_index(self.first_column) + self.headers.index(self.code_column))
+        result = values.get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{self.sheet_name}!{code_column}2:{code_column}"
+        ).execute()
+        return result.get('values', [])
+
+    def refresh(self, service):
+        """Rebuild the index from a single read of the access code column"""
+        self._load(self._fetch(service))
+
+    def _load(self, codes: list):
+        rows_by_code = {}
+        # Sheet rows are 1-based and the first one holds the headers
+        for row_number, cells in enumerate(codes, start=2):
+            if cells and cells[0]:
+                rows_by_code[cells[0]] = row_number
+
+        self._rows = rows_by_code
+        self._records = {}
+        self._loaded_at = time.monotonic()
+
+    def _fetch_rows(self, service, rows: List[int]) -> List[list]:
+        """Cell values of the given sheet rows, read with one batchGet"""
+        result = values_api(service).batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=[self._row_range(row) for row in rows]
+        ).execute()
+        return [(value_range.get('values') or [[]])[0] for value_range in result.get('valueRanges', [])]
+
+    def _store(self, codes: List[str], rows: List[int], values: List[list], started: float) -> bool:
+        """Cache fetched records, returns False if a row no longer holds its code"""
+        self._recent_updates = [update for update in self._recent_updates
+                                if update[0] > time.monotonic() - HTTP_TIMEOUT]
+        consistent = True
+        for code, row, cells in zip(codes, rows, values):
+            record = dict(zip(self.headers, cells))
+            if record.get(self.code_column) != code:
+                # Rows were inserted or moved since the index was built
+                consistent = False
+            elif self._rows.get(code) == row:
+                for at, updated_code, fields in self._recent_updates:
+                    if updated_code == code and at >= started:
+                        record.update(fields)
+                self._records[code] = record
+        return consistent
+
+    def _missing(self, codes: List[str]) -> Tuple[List[str], List[int]]:
+        codes = [code for code in dict.fromkeys(codes) if code in self._rows and code not in self._records]
+        return codes, [self._rows[code] for code in codes]
+
+    def _entries(self, codes: List[str]) -> Dict[str, Tuple[int, dict]]:
+        return {code: (self._rows[code], self._records[code])
+                for code in codes if code in self._rows and code in self._records}
+
+    def row(self, code: str) -> Optional[int]:
+        """Sheet row of an access code as of the last read, without refreshing"""
+        return self._rows.get(code)
+
+    def find_row(self, service, code: str) -> Optional[int]:
+        """Sheet row for an access code, None if it is not in the sheet"""
+        if self.stale:
+            self.refresh(service)
+        row = self._rows.get(code)
+        if row is None and self.age > self.negative_ttl:
+            self.refresh(service)
+            row = self._rows.get(code)
+        return row
+
+    def lookup_many(self, service, codes: List[str]) -> Dict[str, Tuple[int, dict]]:
+        """code -> (row number, record) for the codes found in the sheet"""
+        if self.stale or (any(code not in self._rows for code in codes) and self.age > self.negative_ttl):
+            self.refresh(service)
+
+        for _ in range(2):
+            missing, rows = self._missing(codes)
+            if not missing:
+                break
+            started = time.monotonic()
+            if not self._store(missing, rows, self._fetch_rows(service, rows), started):
+                self.refresh(service)
+        return self._entries(codes)
+
+    def lookup(self, service, code: str) -> Optional[Tuple[int, dict]]:
+        """(row number, record) for an access code, None if it is not in the sheet"""
+        return self.lookup_many(service, [code]).get(code)
+
+    def _revalidate(self, sheets: SheetsPool) -> asyncio.Task:
+        """The in-flight refresh, starting one if none is running"""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._read(sheets))
+            self._refreshing.add_done_callback(self._log_refresh_error)
+        return self._refreshing
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error refreshing RSVP index: {str(task.exception())}")
+
+    async def _read(self, sheets: SheetsPool):
+        self._load(await sheets.run(self._fetch))
+
+    async def revalidate(self, sheets: SheetsPool):
+        """Refresh the index, joining a refresh that is already running"""
+        # Shielded so a caller that gives up does not cancel the read for the others
+        await asyncio.shield(self._revalidate(sheets))
+
+    async def _ensure(self, sheets: SheetsPool, codes: List[str]) -> bool:
+        """Refresh the index as needed for `codes`, returns True if a read was waited for"""
+        waited = False
+        if self.expired:
+            await self.revalidate(sheets)
+            waited = True
+        elif self.stale:
+            self._revalidate(sheets)
+
+        if any(code not in self._rows for code in codes) and self.age > self.negative_ttl:
+            await self.revalidate(sheets)
+            waited = True
+        return waited
+
+    async def find_row_async(self, sheets: SheetsPool, code: str) -> Optional[int]:
+        """find_row() that serves a stale index while it is refreshed in the background"""
+        waited = await self._ensure(sheets, [code])
+        (_CACHE_MISS if waited else _CACHE_HIT).inc()
+        return self._rows.get(code)
+
+    async def lookup_many_async(self, sheets: SheetsPool, codes: List[str]) -> Dict[str, Tuple[int, dict]]:
+        """lookup_many() that serves a stale index while it is refreshed in the background"""
+        waited = await self._ensure(sheets, codes)
+
+        for _ in range(2):
+            missing, rows = self._missing(codes)
+            if not missing:
+                break
+            waited = True
+            started = time.monotonic()
+            if not self._store(missing, rows, await sheets.run(self._fetch_rows, rows), started):
+                await self.revalidate(sheets)
+
+        (_CACHE_MISS if waited else _CACHE_HIT).inc()
+        return self._entries(codes)
+
+    async def lookup_async(self, sheets: SheetsPool, code: str) -> Optional[Tuple[int, dict]]:
+        """lookup() that serves a stale index while it is refreshed in the background"""
+        return (await self.lookup_many_async(sheets, [code])).get(code)
+
+    async def run(self, sheets: SheetsPool):
+        """Re-read the sheet shortly before it goes stale so lookups never wait on it"""
+        while True:
+            try:
+                await self.revalidate(sheets)
+            except Exception:
+                await asyncio.sleep(min(self.negative_ttl, self.ttl))
+                continue
+            await asyncio.sleep(max(self.ttl * 0.9 - self.age, 1))
+
+    def apply_update(self, code: str, fields: Dict[str, str]):
+        """Fold a written update into the cached record"""
+        self._recent_updates.append((time.monotonic(), code, fields))
+        record = self._records.get(code)
+        if record is not None:
+            self._records[code] = {**record, **fields}
+
+
+class RsvpWriteQueue:
+    """Write-behind queue for RSVP updates.
+
+    Updates are acknowledged as soon as they are queued. Pending writes are
+    coalesced per row and column (a later value for the same cell replaces
+    the earlier one) and sent as a single values.batchUpdate every
+    `flush_interval` seconds, or sooner once `max_rows` rows are waiting.
+    Quota (429) and server errors are retried with exponential backoff, and
+    once retries run out (or on network errors) the batch is merged back
+    under any newer writes. batchUpdate is all or nothing, so a batch Sheets
+    rejects for another reason is split until the rejected rows are found;
+    those are dropped and logged, and the rest is written. Readers overlay
+    pending() on cached records, so a guest sees their own update right away.
+
+    Rows come from the index, which may be stale, so before each write the
+    batch's access code cells are read back with one batchGet. If rows were
+    inserted or re-sorted, the index is re-read and the updates move to
+    their guests' current rows. Updates for codes no longer in the sheet
+    are dropped and logged.
+    """
+
+    def __init__(self, spreadsheet_id: str, sheet_name: str, headers: list, index: RsvpIndex,
+                 flush_interval: float = 0.5, max_rows: int = 50, max_retries: int = 5):
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.columns = {header: column_letter(i) for i, header in enumerate(headers)}
+        self.index = index
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.max_retries = max_retries
+
+        self._pending: Dict[int, Tuple[str, Dict[str, str]]] = {}
+        self._inflight: Dict[int, Tuple[str, Dict[str, str]]] = {}
+        self._full = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, row: int, code: str, fields: Dict[str, str]):
+        """Queue new values for a row, replacing any still-pending values for the same cells"""
+        unknown = set(fields) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown RSVP fields: {', '.join(sorted(unknown))}")
+        too_long = sorted(field for field, value in fields.items() if len(value) > CELL_CHARACTER_LIMIT)
+        if too_long:
+            raise ValueError(f"RSVP fields longer than {CELL_CHARACTER_LIMIT} characters: {', '.join(too_long)}")
+
+        _, pending = self._pending.get(row, (code, {}))
+        self._pending[row] = (code, {**pending, **fields})
+        if len(self._pending) >= self.max_rows:
+            self._full.set()
+
+    def pending(self, row: int) -> Dict[str, str]:
+        """Values queued for a row but not yet written"""
+        inflight = self._inflight.get(row)
+        entry = self._pending.get(row)
+        if inflight is None:
+            return entry[1] if entry else {}
+        return {**inflight[1], **entry[1]} if entry else inflight[1]
+
+    def _batch_data(self, batch: dict) -> list:
+        return [
+            {'range': f"{self.sheet_name}!{self.columns[field]}{row}", 'values': [[value]]}
+            for row, (_, fields) in batch.items()
+            for field, value in fields.items()
+        ]
+
+    def _write(self, service, body: dict):
+        values_api(service).batchUpdate(
+            spreadsheetId=self.spreadsheet_id, body=body).execute()
+
+    async def flush(self, sheets: SheetsPool, budget: Optional[float] = None) -> dict:
+        """Write everything pending in one batchUpdate, retrying quota and server errors,
+        returns the rows written. With a `budget`, no retry starts after that many seconds."""
+        if not self._pending:
+            return {}
+        deadline = None if budget is None else time.monotonic() + budget
+        batch, self._pending = self._pending, {}
+        self._full.clear()
+
+        self._inflight = batch
+        rejected = set()
+        try:
+            batch = self._inflight = await self._resolve(sheets, batch, deadline)
+            written = await self._write_rows(sheets, batch, rejected, deadline)
+        except BaseException:
+            # Also on cancellation: the values are idempotent, so rewriting them later is harmless
+            self._requeue({row: entry for row, entry in batch.items() if row not in rejected})
+            raise
+        finally:
+            self._inflight = {}
+
+        for code, fields in written.values():
+            self.index.apply_update(code, fields)
+        return written
+
+    def _fetch_codes(self, service, rows: List[int]) -> List[str]:
+        """Access code cells of the given rows, read with one batchGet"""
+        column = self.columns[self.index.code_column]
+        result = values_api(service).batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=[f"{self.sheet_name}!{column}{row}" for row in rows]
+        ).execute()
+        return [(value_range.get('values') or [['']])[0][0] for value_range in result.get('valueRanges', [])]
+
+    async def _resolve(self, sheets: SheetsPool, batch: dict, deadline: Optional[float]) -> dict:
+        """The batch keyed by the rows its codes are in now"""
+        rows = list(batch)
+        codes = await self._retry(sheets, deadline, self._fetch_codes, rows)
+        moved = [row for row, code in zip(rows, codes) if code != batch[row][0]]
+        if not moved:
+            return batch
+
+        await self.index.revalidate(sheets)
+        resolved = {row: entry for row, entry in batch.items() if row not in moved}
+        for row in moved:
+            code, fields = batch[row]
+            current = self.index.row(code)
+            if current is None:
+                print(f"Dropped RSVP update for {code}: no longer in the sheet (was row {row})")
+                continue
+            _, newer = resolved.get(current, (code, {}))
+            resolved[current] = (code, {**fields, **newer})
+        return resolved
+
+    async def _write_rows(self, sheets: SheetsPool, batch: dict, rejected: set, deadline: Optional[float]) -> dict:
+        """Write a batch, returns the rows written.
+
+        When Sheets rejects the batch with a status that retrying cannot fix,
+        it is written in halves, recursively, and the single rows it still
+        rejects are dropped and added to `rejected`.
+        """
+        from googleapiclient.errors import HttpError
+
+        try:
+            await self._retry(sheets, deadline, self._write, {'valueInputOption': 'RAW', 'data': self._batch_data(batch)})
+            return batch
+        except HttpError as e:
+            if e.resp.status in RETRYABLE_STATUSES:
+                raise
+            if len(batch) == 1:
+                [(row, (code, fields))] = batch.items()
+                rejected.add(row)
+                metrics.RSVP_WRITES_REJECTED.inc()
+                print(f"Dropped RSVP update for {code} (row {row}, fields {', '.join(fields)}): {str(e)}")
+                return {}
+
+        rows = list(batch)
+        half = len(rows) // 2
+        written = await self._write_rows(sheets, {row: batch[row] for row in rows[:half]}, rejected, deadline)
+        return {**written, **await self._write_rows(sheets, {row: batch[row] for row in rows[half:]}, rejected, deadline)}
+
+    async def _retry(self, sheets: SheetsPool, deadline: Optional[float], fn: Callable, *args):
+        """sheets.run(fn, *args), retrying quota and server errors with backoff until `deadline`"""
+        from googleapiclient.errors import HttpError
+
+        for attempt in range(self.max_retries + 1):
+            delay = min(2 ** attempt, 32) + random.random()
+            try:
+                return await sheets.run(fn, *args)
+            except HttpError as e:
+                if (e.resp.status not in RETRYABLE_STATUSES or attempt == self.max_retries
+                        or (deadline is not None and time.monotonic() + delay > deadline)):
+                    raise
+            await asyncio.sleep(delay)
+
+    def _requeue(self, batch: dict):
+        for row, (code, fields) in batch.items():
+            _, newer = self._pending.get(row, (code, {}))
+            self._pending[row] = (code, {**fields, **newer})
+
+    async def run(self, sheets: SheetsPool):
+        """Flush on an interval (or when full) until cancelled"""
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+                try:
+                    await self.flush(sheets)
+                except Exception as e:
+                    print(f"Error writing RSVP updates: {str(e)}")
+        finally:
+            await self.flush(sheets)
@@ -0,0 +1,67 @@
+"""Opening and closing game rooms."""
+import asyncio
+import os
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault('QUESTION_BANK_DIR', os.path.join(REPO_ROOT, 'game', 'questions'))
+
+import main  # noqa: E402
+
+
+def test_concurrent_requests_reopen_a_closing_room_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'GAME_EVENT_LOG', str(tmp_path / 'game_events.jsonl'))
+
+    async def reopen():
+        rooms = main.GameRooms()
+        room = await rooms.create('abc', main.default_bank)
+        async with room.store.transaction(room.state):
+            room.state.register_team('Aces')
+            room.publish()
+
+        rooms._close(room)
+        first, second = await asyncio.gather(rooms.get('abc'), rooms.get('abc'))
+        await rooms.close_all()
+        return first, second
+
+    first, second = asyncio.run(reopen())
+
+    assert first is second
+    assert list(first.state.teams) == ['Aces']
+
+
+def test_full_worker_only_closes_rooms_without_a_game_in_progress(monkeypatch):
+    monkeypatch.setattr(main, 'GAME_EVENT_LOG', None)
+
+    async def register(room, team_name):
+        async with room.store.transaction(room.state):
+            room.state.register_team(team_name)
+            room.publish()
+
+    async def fill():
+        rooms = main.GameRooms(max_rooms=2, evict_after=60)
+        await register(await rooms.create('abc', main.default_bank), 'Aces')
+        empty = await rooms.create('def', main.default_bank)
+
+        # Nobody plays in the empty room, but it was used too recently to close
+        with pytest.raises(HTTPException) as recent:
+            await rooms.create('ghi', main.default_bank)
+        empty.last_active -= 61
+        await register(await rooms.create('ghi', main.default_bank), 'Bees')
+        opened = [room.code for room in rooms]
+
+        for room in rooms:
+            room.last_active -= 61
+        with pytest.raises(HTTPException) as playing:
+            await rooms.create('jkl', main.default_bank)
+        await rooms.close_all()
+        return recent.value, opened, playing.value
+
+    recent, opened, playing = asyncio.run(fill())
+
+    assert recent.status_code == playing.status_code == 503
+    assert opened == ['abc', 'ghi']